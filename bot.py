@@ -0,0 +1,238 @@
+"""
+Laço principal do bot de trading.
+
+Mantém o histórico de preços/volumes por par, calcula os indicadores
+via os kernels compilados de ``core`` e decide entradas/saídas pela
+camada de ``strategy``. Os kernels são aquecidos no __init__ — o
+primeiro tick real não paga compilação de JIT.
+"""
+
+import asyncio
+import logging
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from core._mtf_kernels import _warmup as _warmup_mtf
+from core._strategy_kernels import _warmup as _warmup_decisao
+from core.estrategias import IndicatorState
+from core.log_manager import LogManager
+from core.portfolio import PortfolioManager, PositionType
+from core.risk_manager import RiskManager
+from database import DatabaseManager
+from strategy import analisar_lote, ticker_from_dict
+
+logger = logging.getLogger(__name__)
+
+PARES_PADRAO = ["BTCUSDT", "ETHUSDT", "BNBUSDT", "SOLUSDT"]
+
+
+class PairHistory:
+    """Histórico de preços/volumes de um par em ring buffer SoA.
+
+    Arrays float32 pré-alocados de tamanho fixo: append O(1) sem
+    realocação, memória limitada (listas Python cresciam sem teto e
+    viravam array de novo a cada indicador). ``view()`` devolve a
+    janela em ordem cronológica — fatia zero-copy enquanto o ring não
+    dá a volta, uma concatenação de duas fatias depois.
+    """
+
+    __slots__ = ("capacity", "prices", "volumes", "head", "filled")
+
+    def __init__(self, capacity: int = 500):
+        self.capacity = capacity
+        self.prices = np.empty(capacity, dtype=np.float32)
+        self.volumes = np.empty(capacity, dtype=np.float32)
+        self.head = 0
+        self.filled = 0
+
+    def __len__(self) -> int:
+        return self.filled
+
+    def append(self, preco: float, volume: float = 0.0):
+        self.prices[self.head] = preco
+        self.volumes[self.head] = volume
+        self.head = (self.head + 1) % self.capacity
+        if self.filled < self.capacity:
+            self.filled += 1
+
+    def view(self) -> np.ndarray:
+        """Preços em ordem cronológica, prontos para os kernels."""
+        if self.filled < self.capacity:
+            return self.prices[:self.filled]
+        if self.head == 0:
+            return self.prices
+        return np.concatenate(
+            (self.prices[self.head:], self.prices[:self.head])
+        )
+
+
+class TradingBot:
+    """Orquestra coleta de dados, decisão e execução por par."""
+
+    def __init__(self, api=None, pares: Optional[List[str]] = None,
+                 capital_inicial: float = 10000.0,
+                 intervalo: float = 10.0):
+        self.api = api
+        self.pares = list(pares or PARES_PADRAO)
+        self.intervalo = intervalo
+        self.rodando = False
+
+        self.historico: Dict[str, PairHistory] = {
+            par: PairHistory() for par in self.pares
+        }
+        self.ultimo_preco: Dict[str, float] = {}
+        # Memoização dos indicadores por barra: dict explícito em vez
+        # de lru_cache (sem hashing de tupla no caminho quente). O id
+        # avança em append_price, o que invalida a entrada.
+        self._bar_id: Dict[str, int] = {par: 0 for par in self.pares}
+        self._indic_cache: Dict[str, tuple] = {}
+        # Estado incremental por par: cada barra nova avança as
+        # recorrências (EMAs, somas da janela do RSI) em O(1) no
+        # append — nada de repassar o histórico inteiro por tick.
+        self._ind_state: Dict[str, IndicatorState] = {
+            par: IndicatorState() for par in self.pares
+        }
+        self._ema9: Dict[str, float] = {}
+
+        self.portfolio = PortfolioManager(initial_capital=capital_inicial)
+        self.risk = RiskManager()
+        self.db = DatabaseManager()
+        self.logs = LogManager()
+
+        # Compila/carrega os kernels antes do primeiro tick.
+        _warmup_mtf()
+        _warmup_decisao()
+
+    # ------------------------------------------------------------------
+    # Histórico e indicadores
+    # ------------------------------------------------------------------
+
+    _K_EMA9 = 2.0 / (9 + 1)
+
+    def append_price(self, par: str, preco: float, volume: float = 0.0):
+        self.historico[par].append(preco, volume)
+        self.ultimo_preco[par] = preco
+        self._bar_id[par] += 1
+        self._ind_state[par].update(preco)
+        ema9 = self._ema9.get(par)
+        self._ema9[par] = preco if ema9 is None else (
+            preco * self._K_EMA9 + ema9 * (1.0 - self._K_EMA9)
+        )
+
+    def calcular_indicadores(self, par: str) -> Optional[dict]:
+        """Indicadores do par — leitura pura do estado incremental.
+
+        RSI/MACD/EMA9 já foram avançados em append_price (O(1) por
+        barra); aqui só restam as médias móveis, reduções sobre as
+        janelas finais do ring. Chamadas repetidas dentro da mesma
+        barra (decisão + ML no mesmo tick) voltam do cache.
+        """
+        cached = self._indic_cache.get(par)
+        bar_id = self._bar_id[par]
+        if cached is not None and cached[0] == bar_id:
+            return cached[1]
+
+        arr = self.historico[par].view()
+        n = len(arr)
+        if n < 2:
+            return None
+
+        state = self._ind_state[par]
+        rsi = state.rsi
+        macd = state.macd
+        ema9 = self._ema9[par] if n >= 9 else None
+
+        indicadores = {
+            "rsi": rsi,
+            "macd": macd,
+            "ema9": ema9,
+            "ma7": float(arr[-7:].mean()) if n >= 7 else None,
+            "ma25": float(arr[-25:].mean()) if n >= 25 else None,
+            "ma99": float(arr[-99:].mean()) if n >= 99 else None,
+        }
+        self._indic_cache[par] = (bar_id, indicadores)
+        return indicadores
+
+    # ------------------------------------------------------------------
+    # Laço principal
+    # ------------------------------------------------------------------
+
+    async def tick(self):
+        """Um ciclo: coleta, decide e executa para todos os pares."""
+        n = len(self.pares)
+        resultados = await asyncio.gather(
+            *(self.api.get_price(p) for p in self.pares),
+            *(self.api.get_24h_ticker(p) for p in self.pares),
+            *(self.api.get_klines(p, "1h", 100) for p in self.pares),
+            return_exceptions=True,
+        )
+
+        lote = []
+        for i, par in enumerate(self.pares):
+            preco = resultados[i]
+            dados_24h = resultados[n + i]
+            candles = resultados[2 * n + i]
+            if any(isinstance(r, Exception)
+                   for r in (preco, dados_24h, candles)):
+                logger.warning("⚠️ Falha ao coletar %s", par)
+                continue
+            ticker = ticker_from_dict(dados_24h)
+            self.append_price(par, float(preco), ticker.quote_volume)
+            lote.append((par, float(preco), candles, ticker))
+
+        for analise in analisar_lote(lote):
+            self._executar_sinal(analise)
+
+        antes = self.portfolio._trade_count
+        self.portfolio.update_positions(dict(self.ultimo_preco))
+        for i in range(antes, self.portfolio._trade_count):
+            trade = self.portfolio._materialize_trade(i)
+            self.risk.add_trade(trade["symbol"], trade["pnl"],
+                                trade["pnl_pct"] / 100)
+            self.db.add_trade(trade["symbol"], "SELL",
+                              trade["exit_price"], trade["quantity"],
+                              trade["pnl"], trade["reason"])
+            self.logs.registrar_trade(trade["symbol"], "SELL",
+                                      trade["exit_price"],
+                                      trade["quantity"], trade["pnl"],
+                                      trade["reason"])
+
+    def _executar_sinal(self, analise: dict):
+        par = analise["symbol"]
+        if analise["sinal"] != "COMPRA" or par not in self.ultimo_preco:
+            return
+        preco = self.ultimo_preco[par]
+        tamanho = self.risk.calculate_position_size_fixed_risk(
+            self.portfolio.available_cash, preco, analise["stop_loss"]
+        )
+        if tamanho <= 0:
+            return
+        quantidade = tamanho / preco
+        if self.portfolio.open_position(
+            par, PositionType.LONG, preco, quantidade,
+            analise["stop_loss"], analise["take_profit"],
+        ):
+            self.db.add_trade(par, "BUY", preco, quantidade,
+                              0.0, analise["motivos"])
+            self.logs.registrar_trade(par, "BUY", preco, quantidade,
+                                      0.0, analise["motivos"])
+
+    async def run(self):
+        if self.api is None:
+            logger.error("❌ Sem cliente de API configurado")
+            return
+        self.rodando = True
+        logger.info("🚀 Bot iniciado com %d pares", len(self.pares))
+        try:
+            while self.rodando:
+                await self.tick()
+                await asyncio.sleep(self.intervalo)
+        finally:
+            self.rodando = False
+            self.db.flush()
+            self.logs.flush()
+            logger.info("🛑 Bot encerrado")
+
+    def parar(self):
+        self.rodando = False
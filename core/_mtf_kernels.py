@@ -0,0 +1,179 @@
+"""
+Kernels numéricos da estratégia multi-timeframe.
+
+Funções puras sobre ``np.ndarray`` compiladas com numba quando
+disponível; sem numba rodam como Python puro via o fallback de
+``core._njit``. As assinaturas explícitas (float32) fazem a compilação
+acontecer no import — nada de pausa de JIT no primeiro tick — e fixam o
+dtype de trabalho em 32 bits.
+"""
+
+import numpy as np
+
+from ._njit import njit, prange
+
+
+@njit(["float64(float32[:], int64)"], cache=True, fastmath=True,
+      boundscheck=False, nogil=True)
+def _ema(prices, period):
+    k = 2.0 / (period + 1)
+    ema = prices[0]
+    for i in range(1, prices.shape[0]):
+        ema = prices[i] * k + ema * (1.0 - k)
+    return ema
+
+
+@njit(["float64(float32[:], int64)"], cache=True, fastmath=True,
+      boundscheck=False, nogil=True)
+def _rsi(prices, period):
+    n = prices.shape[0]
+    gain = 0.0
+    loss = 0.0
+    for i in range(n - period, n):
+        delta = prices[i] - prices[i - 1]
+        if delta > 0.0:
+            gain += delta
+        else:
+            loss -= delta
+    if loss == 0.0:
+        return 100.0
+    rs = gain / loss
+    return 100.0 - 100.0 / (1.0 + rs)
+
+
+@njit(["float64(float32[:], int64, int64)"], cache=True, fastmath=True,
+      boundscheck=False, nogil=True)
+def _macd(prices, fast, slow):
+    k_fast = 2.0 / (fast + 1)
+    k_slow = 2.0 / (slow + 1)
+    ema_fast = prices[0]
+    ema_slow = prices[0]
+    for i in range(1, prices.shape[0]):
+        ema_fast = prices[i] * k_fast + ema_fast * (1.0 - k_fast)
+        ema_slow = prices[i] * k_slow + ema_slow * (1.0 - k_slow)
+    return ema_fast - ema_slow
+
+
+@njit(["float64[:](float32[:], int64[:])"], cache=True, fastmath=True,
+      boundscheck=False, nogil=True)
+def _multi_ema(prices, periods):
+    """Todas as EMAs pedidas numa única passada pelos preços.
+
+    Carrega cada preço da memória uma vez e avança todas as recorrências
+    no laço interno — N leituras em vez de N por período.
+    """
+    m = periods.shape[0]
+    emas = np.empty(m, dtype=np.float64)
+    ks = np.empty(m, dtype=np.float64)
+    for j in range(m):
+        ks[j] = 2.0 / (periods[j] + 1)
+        emas[j] = prices[0]
+    for i in range(1, prices.shape[0]):
+        price = prices[i]
+        for j in range(m):
+            emas[j] = price * ks[j] + emas[j] * (1.0 - ks[j])
+    return emas
+
+
+@njit(["float64[:](float32[:, :], int64)"], cache=True, fastmath=True,
+      boundscheck=False, parallel=True)
+def _ema_batch(prices, period):
+    """EMA final de cada linha de uma matriz (símbolo, tempo).
+
+    As linhas são independentes, então prange distribui os símbolos
+    entre os núcleos.
+    """
+    n_symbols = prices.shape[0]
+    n_bars = prices.shape[1]
+    out = np.empty(n_symbols, dtype=np.float64)
+    k = 2.0 / (period + 1)
+    for s in prange(n_symbols):
+        ema = prices[s, 0]
+        for i in range(1, n_bars):
+            ema = prices[s, i] * k + ema * (1.0 - k)
+        out[s] = ema
+    return out
+
+
+@njit(["float64[:](float32[:, :], int64)"], cache=True, fastmath=True,
+      boundscheck=False, parallel=True)
+def _rsi_batch(prices, period):
+    """RSI final de cada linha de uma matriz (símbolo, tempo)."""
+    n_symbols = prices.shape[0]
+    n_bars = prices.shape[1]
+    out = np.empty(n_symbols, dtype=np.float64)
+    for s in prange(n_symbols):
+        gain = 0.0
+        loss = 0.0
+        for i in range(n_bars - period, n_bars):
+            delta = prices[s, i] - prices[s, i - 1]
+            if delta > 0.0:
+                gain += delta
+            else:
+                loss -= delta
+        if loss == 0.0:
+            out[s] = 100.0
+        else:
+            rs = gain / loss
+            out[s] = 100.0 - 100.0 / (1.0 + rs)
+    return out
+
+
+@njit(["float64[:](float32[:], int64, int64, int64, int64)"],
+      cache=True, fastmath=True, boundscheck=False, nogil=True)
+def _indicadores_fundidos(prices, rsi_period, fast, slow, ema_span):
+    """RSI, MACD e EMA extra numa única passada pelos preços.
+
+    Três travessias separadas viram uma: cada preço é carregado da
+    memória uma vez e alimenta as três recorrências de EMA e as somas
+    de ganho/perda da janela final do RSI. Devolve [rsi, macd, ema].
+    """
+    n = prices.shape[0]
+    k_fast = 2.0 / (fast + 1)
+    k_slow = 2.0 / (slow + 1)
+    k_ema = 2.0 / (ema_span + 1)
+    ema_fast = prices[0]
+    ema_slow = prices[0]
+    ema = prices[0]
+    gain = 0.0
+    loss = 0.0
+    start = n - rsi_period
+    for i in range(1, n):
+        price = prices[i]
+        ema_fast = price * k_fast + ema_fast * (1.0 - k_fast)
+        ema_slow = price * k_slow + ema_slow * (1.0 - k_slow)
+        ema = price * k_ema + ema * (1.0 - k_ema)
+        if i >= start:
+            delta = price - prices[i - 1]
+            if delta > 0.0:
+                gain += delta
+            else:
+                loss -= delta
+
+    out = np.empty(3, dtype=np.float64)
+    if loss == 0.0:
+        out[0] = 100.0
+    else:
+        rs = gain / loss
+        out[0] = 100.0 - 100.0 / (1.0 + rs)
+    out[1] = ema_fast - ema_slow
+    out[2] = ema
+    return out
+
+
+def _warmup():
+    """Executa cada kernel uma vez para disparar a compilação no startup.
+
+    Com assinaturas explícitas a compilação já acontece no import; a
+    chamada dummy cobre também o cache em disco frio, garantindo que o
+    primeiro tick real não pague o custo de JIT.
+    """
+    dummy = np.linspace(1.0, 2.0, 32, dtype=np.float32)
+    _ema(dummy, 12)
+    _rsi(dummy, 14)
+    _macd(dummy, 12, 26)
+    _multi_ema(dummy, np.array([12, 26], dtype=np.int64))
+    _indicadores_fundidos(dummy, 14, 12, 26, 9)
+    dummy_2d = dummy.reshape(2, 16)
+    _ema_batch(dummy_2d, 12)
+    _rsi_batch(dummy_2d, 14)
@@ -0,0 +1,24 @@
+"""
+Decorator ``njit`` com fallback transparente.
+
+Quando o numba está instalado, expõe o ``numba.njit`` real; caso
+contrário, devolve a função pura sem compilação — mesmo comportamento,
+sem a dependência obrigatória.
+"""
+
+try:
+    from numba import njit, prange  # noqa: F401
+    HAS_NUMBA = True
+except ImportError:  # pragma: no cover - depende do ambiente
+    HAS_NUMBA = False
+
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+
+        def wrapper(func):
+            return func
+
+        return wrapper
+
+    prange = range
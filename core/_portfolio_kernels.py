@@ -0,0 +1,119 @@
+"""
+Kernels numéricos do portfólio e do gestor de risco.
+
+Varredura de posições (PnL + stops/alvos) sobre arrays SoA e drawdown
+máximo de curvas de capital, compilados com numba quando disponível.
+"""
+
+from ._njit import njit, prange
+
+
+@njit(cache=True, fastmath=True)
+def _sweep(prices, entry, qty, sl, tp, is_long, out_pnl, exit_flags):
+    """Atualiza PnL e marca saídas de todas as posições numa passada.
+
+    exit_flags: 0 = mantém, 1 = stop loss, 2 = take profit.
+    """
+    for i in range(prices.shape[0]):
+        sign = 1.0 if is_long[i] == 1 else -1.0
+        out_pnl[i] = sign * (prices[i] - entry[i]) * qty[i]
+
+        flag = 0
+        if is_long[i] == 1:
+            if prices[i] <= sl[i]:
+                flag = 1
+            elif prices[i] >= tp[i]:
+                flag = 2
+        else:
+            if prices[i] >= sl[i]:
+                flag = 1
+            elif prices[i] <= tp[i]:
+                flag = 2
+        exit_flags[i] = flag
+
+
+# fastmath restrito: o conjunto abaixo mantém contração/reassociação mas
+# exclui "nnan" — com fastmath=True o LLVM assume que NaN não existe e
+# pode dobrar x != x para False, quebrando os sentinelas deste kernel.
+@njit(["void(float32[:], float32[:], float32[:], float32[:], float32[:],"
+       " uint8[:], uint8[:], float64, float64)"],
+      cache=True, fastmath={"contract", "arcp", "reassoc", "nsz"},
+      boundscheck=False, parallel=True)
+def _update_trailing_stops(prices, highest, lowest, stop, entry,
+                           activated, is_long, act_thresh, dist):
+    """Avança todos os trailing stops em paralelo (linhas independentes).
+
+    NaN em prices pula o símbolo; NaN em stop significa "sem stop
+    ainda" (NaN != NaN serve de teste).
+    """
+    for i in prange(prices.shape[0]):
+        price = prices[i]
+        if price != price:
+            continue
+        if is_long[i] == 1:
+            if price > highest[i]:
+                highest[i] = price
+            if (price - entry[i]) / entry[i] >= act_thresh:
+                activated[i] = 1
+            if activated[i] == 1:
+                candidate = price * (1.0 - dist)
+                if stop[i] != stop[i] or candidate > stop[i]:
+                    stop[i] = candidate
+        else:
+            if price < lowest[i]:
+                lowest[i] = price
+            if (entry[i] - price) / entry[i] >= act_thresh:
+                activated[i] = 1
+            if activated[i] == 1:
+                candidate = price * (1.0 + dist)
+                if stop[i] != stop[i] or candidate < stop[i]:
+                    stop[i] = candidate
+
+
+@njit(["float64(float64, float64, float64, float64, float64)"],
+      cache=True, fastmath=True)
+def _kelly_size(capital, win_rate, avg_win, avg_loss, max_position_size):
+    """Tamanho de posição por meio-Kelly, com teto e fallback de 2%."""
+    if (win_rate <= 0.0 or win_rate >= 1.0
+            or avg_win <= 0.0 or avg_loss <= 0.0):
+        return capital * 0.02
+    b = avg_win / avg_loss
+    kelly = (b * win_rate - (1.0 - win_rate)) / b
+    if kelly < 0.0:
+        kelly = 0.0
+    elif kelly > 0.25:
+        kelly = 0.25
+    size = capital * kelly * 0.5
+    cap = capital * max_position_size
+    return size if size < cap else cap
+
+
+@njit(["float64(float64, float64, float64, float64, float64)"],
+      cache=True, fastmath=True)
+def _fixed_risk_size(capital, entry, stop, risk_per_trade,
+                     max_position_size):
+    """Tamanho por risco fixo entre entrada e stop, com teto."""
+    if capital <= 0.0 or entry <= 0.0:
+        return 0.0
+    risk_unit = abs(entry - stop)
+    if risk_unit <= 0.0:
+        return capital * 0.02
+    value = (capital * risk_per_trade / risk_unit) * entry
+    cap = capital * max_position_size
+    return value if value < cap else cap
+
+
+@njit(["float64(float64[:])"], cache=True, fastmath=True)
+def _max_drawdown(equity):
+    """Drawdown máximo (fração) de uma curva de capital."""
+    peak = equity[0]
+    max_dd = 0.0
+    for i in range(equity.shape[0]):
+        value = equity[i]
+        if value > peak:
+            peak = value
+        if peak > 0.0:
+            dd = 1.0 - value / peak
+            if dd > max_dd:
+                max_dd = dd
+    return max_dd
@@ -0,0 +1,70 @@
+"""
+Kernel numérico da decisão de entrada/saída.
+
+O caminho de decisão (RSI + MACD + médias + score) é pura aritmética
+chamada por símbolo a cada tick; compilado com numba ele cruza a
+fronteira Python→nativo uma vez por chamada. Indicador ausente chega
+como NaN (teste x != x, como nos outros kernels). O sinal volta como
+int: 0 = AGUARDAR, 1 = COMPRA, 2 = VENDA.
+"""
+
+from ._njit import njit
+
+AGUARDAR = 0
+COMPRA = 1
+VENDA = 2
+
+
+# fastmath restrito (sem "nnan"): os indicadores ausentes chegam como
+# NaN e os testes x != x abaixo precisam continuar definidos.
+@njit(["UniTuple(float64, 3)(float64, float64, float64, float64,"
+       " float64, float64, uint8)"], cache=True,
+      fastmath={"contract", "arcp", "reassoc", "nsz"},
+      boundscheck=False, nogil=True)
+def _decide(preco, rsi, macd, ma7, ma25, variacao, volume_alto):
+    """Avalia as condições como bitmask e devolve (código, sl, tp).
+
+    O código empacota sinal (2 bits baixos) e a máscara de condições do
+    lado vencedor (4 bits seguintes) — o chamador deriva os motivos dos
+    bits, sem reavaliar nada.
+    """
+    mas_ok = ma7 == ma7 and ma25 == ma25
+
+    compra = 0
+    if rsi == rsi and rsi < 30.0:
+        compra |= 1
+    if mas_ok and preco > ma7 > ma25:
+        compra |= 2
+    if macd == macd and macd > 0.0:
+        compra |= 4
+    if variacao < -2.0 and volume_alto == 1:
+        compra |= 8
+
+    venda = 0
+    if rsi == rsi and rsi > 70.0:
+        venda |= 1
+    if mas_ok and preco < ma7 < ma25:
+        venda |= 2
+    if macd == macd and macd < 0.0:
+        venda |= 4
+    if variacao > 2.0 and volume_alto == 1:
+        venda |= 8
+
+    # popcount de 4 bits, sem laço.
+    n_compra = (compra & 1) + ((compra >> 1) & 1) \
+        + ((compra >> 2) & 1) + ((compra >> 3) & 1)
+    n_venda = (venda & 1) + ((venda >> 1) & 1) \
+        + ((venda >> 2) & 1) + ((venda >> 3) & 1)
+
+    if n_compra >= 2:
+        return (float(COMPRA | (compra << 2)),
+                preco * 0.97, preco * 1.06)
+    if n_venda >= 2:
+        return (float(VENDA | (venda << 2)),
+                preco * 1.03, preco * 0.94)
+    return (0.0, 0.0, 0.0)
+
+
+def _warmup():
+    """Dispara a compilação no startup (cache frio incluso)."""
+    _decide(100.0, 25.0, 1.0, 99.0, 98.0, -3.0, 1)
@@ -0,0 +1,198 @@
+"""
+Indicadores técnicos e estratégias básicas.
+
+Funções puras de cálculo (RSI, EMA, MACD, médias móveis) usadas pelo bot
+e pelas camadas de estratégia.
+"""
+
+from collections import deque
+
+import numpy as np
+
+from ._mtf_kernels import _ema, _indicadores_fundidos, _macd
+
+
+def calcular_rsi(precos, periodo: int = 14):
+    """Calcula o RSI (Relative Strength Index) do último período.
+
+    Só a janela final importa: np.diff + np.maximum sobre os últimos
+    ``periodo + 1`` preços — ufuncs SIMD em vez de list comprehensions
+    elemento a elemento.
+    """
+    if len(precos) < periodo + 1:
+        return None
+
+    cauda = np.asarray(precos[-(periodo + 1):], dtype=np.float64)
+    deltas = np.diff(cauda)
+    # Separação sem branch: |d| é calculado uma vez e os ganhos/perdas
+    # saem por soma/subtração — (d + |d|)/2 e (|d| - d)/2.
+    abs_deltas = np.abs(deltas)
+    media_ganhos = float((deltas + abs_deltas).mean()) * 0.5
+    media_perdas = float((abs_deltas - deltas).mean()) * 0.5
+
+    if media_perdas == 0:
+        return 100.0
+    rs = media_ganhos / media_perdas
+    return 100 - (100 / (1 + rs))
+
+
+def calcular_ema(precos, periodo: int):
+    """Calcula a EMA (média móvel exponencial) do último preço.
+
+    A recorrência roda no kernel compilado de core._mtf_kernels —
+    doubles nativos no laço, sem um PyFloat por preço.
+    """
+    if len(precos) < periodo:
+        return None
+    return float(_ema(np.asarray(precos, dtype=np.float32), periodo))
+
+
+def calcular_macd(precos, rapida: int = 12, lenta: int = 26):
+    """Calcula a linha MACD (EMA rápida - EMA lenta).
+
+    As duas recorrências avançam em lockstep no kernel compilado — uma
+    passada pela memória em vez de duas, sem dispatch Python.
+    """
+    if len(precos) < lenta:
+        return None
+    return float(_macd(np.asarray(precos, dtype=np.float32),
+                       rapida, lenta))
+
+
+class IndicatorState:
+    """Indicadores incrementais por símbolo.
+
+    Recalcular RSI/MACD sobre o histórico inteiro a cada tick custa
+    O(N) por atualização — quadrático ao longo de um backtest. Aqui o
+    estado guardado são as EMAs do MACD e as somas correntes de
+    ganho/perda da janela deslizante do RSI; cada preço novo aplica só
+    a atualização de uma amostra: O(1).
+    """
+
+    __slots__ = ("periodo_rsi", "rapida", "lenta", "_k_rapida",
+                 "_k_lenta", "ema_rapida", "ema_lenta", "_ganhos",
+                 "_perdas", "gain_sum", "loss_sum", "_ultimo_preco",
+                 "n_amostras")
+
+    def __init__(self, periodo_rsi: int = 14, rapida: int = 12,
+                 lenta: int = 26):
+        self.periodo_rsi = periodo_rsi
+        self.rapida = rapida
+        self.lenta = lenta
+        self._k_rapida = 2.0 / (rapida + 1)
+        self._k_lenta = 2.0 / (lenta + 1)
+        self.ema_rapida = 0.0
+        self.ema_lenta = 0.0
+        # Janela deslizante de ganhos/perdas com somas correntes: o
+        # delta que sai é descontado e o que entra é somado — nenhuma
+        # ressoma de ``periodo`` termos, e o RSI incremental fica
+        # idêntico ao da janela de calcular_rsi.
+        self._ganhos = deque(maxlen=periodo_rsi)
+        self._perdas = deque(maxlen=periodo_rsi)
+        self.gain_sum = 0.0
+        self.loss_sum = 0.0
+        self._ultimo_preco = 0.0
+        self.n_amostras = 0
+
+    def update(self, preco: float):
+        """Avança todos os indicadores com um preço novo."""
+        self.n_amostras += 1
+        if self.n_amostras == 1:
+            self.ema_rapida = self.ema_lenta = preco
+            self._ultimo_preco = preco
+            return
+
+        self.ema_rapida = (preco * self._k_rapida
+                           + self.ema_rapida * (1.0 - self._k_rapida))
+        self.ema_lenta = (preco * self._k_lenta
+                          + self.ema_lenta * (1.0 - self._k_lenta))
+
+        delta = preco - self._ultimo_preco
+        self._ultimo_preco = preco
+        ganho = delta if delta > 0 else 0.0
+        perda = -delta if delta < 0 else 0.0
+
+        if len(self._ganhos) == self.periodo_rsi:
+            # Janela cheia: o termo mais antigo sai das somas antes de
+            # o deque descartá-lo no append.
+            self.gain_sum -= self._ganhos[0]
+            self.loss_sum -= self._perdas[0]
+        self._ganhos.append(ganho)
+        self._perdas.append(perda)
+        self.gain_sum += ganho
+        self.loss_sum += perda
+
+    @property
+    def rsi(self):
+        if len(self._ganhos) < self.periodo_rsi:
+            return None
+        if self.loss_sum == 0:
+            return 100.0
+        # As médias dividem ambas por ``periodo`` — a razão das somas
+        # já é o RS.
+        rs = self.gain_sum / self.loss_sum
+        return 100 - (100 / (1 + rs))
+
+    @property
+    def macd(self):
+        if self.n_amostras < self.lenta:
+            return None
+        return self.ema_rapida - self.ema_lenta
+
+
+def calcular_medias_moveis(candles):
+    """Extrai fechamentos dos candles e calcula MA7, MA25 e MA99.
+
+    O filtro de candles malformados e a conversão para float são fundidos
+    num único gerador consumido por np.fromiter — sem listas temporárias.
+    """
+    fechamentos = np.fromiter(
+        (
+            float(c[4])
+            for c in candles
+            if isinstance(c, (list, tuple)) and len(c) >= 5
+        ),
+        dtype=np.float64,
+    )
+
+    if not len(fechamentos):
+        return None
+
+    medias = {}
+    for janela, nome in ((7, "ma7"), (25, "ma25"), (99, "ma99")):
+        if len(fechamentos) >= janela:
+            medias[nome] = float(fechamentos[-janela:].mean())
+        else:
+            medias[nome] = None
+    medias["fechamentos"] = fechamentos
+    return medias
+
+
+def calcular_indicadores(candles):
+    """Calcula o conjunto de indicadores usado nas decisões de entrada."""
+    medias = calcular_medias_moveis(candles)
+    if medias is None:
+        return None
+
+    fechamentos = medias.pop("fechamentos")
+    # Conversão única: os indicadores recebem o array direto, sem
+    # materializar uma lista de PyFloats.
+    precos = fechamentos.astype(np.float32)
+
+    if len(precos) >= 26:
+        # Histórico completo: RSI, MACD e EMA9 saem do kernel fundido
+        # numa única passada pela memória, em vez de três.
+        rsi, macd, ema9 = _indicadores_fundidos(precos, 14, 12, 26, 9)
+        return {
+            "rsi": float(rsi),
+            "macd": float(macd),
+            "ema9": float(ema9),
+            **medias,
+        }
+
+    return {
+        "rsi": calcular_rsi(precos),
+        "macd": calcular_macd(precos),
+        "ema9": calcular_ema(precos, 9),
+        **medias,
+    }
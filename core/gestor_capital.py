@@ -0,0 +1,101 @@
+"""
+Gestão de capital.
+
+Acompanha o capital corrente e o resultado do dia, persistindo o
+histórico em CSV com handle aberto uma vez (buffer de 64 KiB) em vez
+de reabrir o arquivo a cada gravação.
+"""
+
+import atexit
+import csv
+import os
+from datetime import datetime
+from typing import Optional
+
+
+class GestorCapital:
+    """Controla o capital do bot e registra a evolução em CSV."""
+
+    def __init__(self, capital_inicial: float = 1000.0,
+                 arquivo: str = "capital_historico.csv"):
+        self.capital_inicial = capital_inicial
+        self.capital_atual = capital_inicial
+        self.pnl_dia = 0.0
+        self.operacoes_dia = 0
+
+        self.arquivo = arquivo
+        novo = not os.path.exists(arquivo) or os.path.getsize(arquivo) == 0
+        self._fh = open(arquivo, "a", buffering=1 << 16, newline="",
+                        encoding="utf-8")
+        self._writer = csv.writer(self._fh)
+        if novo:
+            self._writer.writerow([
+                "timestamp", "capital", "pnl_dia", "operacoes_dia",
+            ])
+        atexit.register(self.fechar)
+
+    def registrar_operacao(self, pnl: float):
+        """Aplica o resultado de uma operação ao capital."""
+        self.capital_atual += pnl
+        self.pnl_dia += pnl
+        self.operacoes_dia += 1
+
+    def resetar_dia(self):
+        """Zera os contadores diários (chamado na virada do dia)."""
+        self.salvar_dados()
+        self.flush()
+        self.pnl_dia = 0.0
+        self.operacoes_dia = 0
+
+    def salvar_dados(self, timestamp: Optional[datetime] = None):
+        """Grava uma linha do histórico no writer persistente."""
+        ts = timestamp if timestamp is not None else datetime.now()
+        self._writer.writerow([
+            ts.isoformat(), f"{self.capital_atual:.2f}",
+            f"{self.pnl_dia:.2f}", self.operacoes_dia,
+        ])
+
+    def carregar_dados(self) -> bool:
+        """Restaura capital e contadores da última linha do histórico.
+
+        Leitura limitada à cauda do arquivo (8 KiB via seek) — o custo
+        de startup independe do tamanho do log, em vez de varrer o CSV
+        inteiro atrás da última linha.
+        """
+        if not os.path.exists(self.arquivo):
+            return False
+        size = os.path.getsize(self.arquivo)
+        if size == 0:
+            return False
+
+        self.flush()
+        with open(self.arquivo, "rb") as f:
+            f.seek(max(0, size - 8192))
+            tail = f.read()
+
+        lines = [ln for ln in tail.split(b"\n") if ln.strip()]
+        if not lines:
+            return False
+        last = lines[-1].decode("utf-8")
+        if last.startswith("timestamp"):
+            return False  # só o cabeçalho
+
+        row = next(csv.reader([last]), None)
+        if not row or len(row) < 4:
+            return False
+        try:
+            self.capital_atual = float(row[1])
+            self.pnl_dia = float(row[2])
+            self.operacoes_dia = int(row[3])
+        except ValueError:
+            return False
+        return True
+
+    def flush(self):
+        self._fh.flush()
+
+    def fechar(self):
+        try:
+            self._fh.close()
+        except ValueError:
+            pass  # já fechado
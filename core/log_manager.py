@@ -0,0 +1,324 @@
+"""
+Registro de operações.
+
+Trades vão para um dataset Parquet colunar (pyarrow) — um part file
+por execução, writer aberto uma vez e flush em lotes — arquivo menor e
+releitura binária rápida no fim do dia. Sem pyarrow instalado, ou com
+``LEGACY_CSV``, tudo cai no emissor CSV de handle persistente; status
+diário e alertas continuam em CSV (volume mínimo).
+"""
+
+import atexit
+import csv
+import mmap
+import os
+import time
+from datetime import datetime
+from typing import Dict, List, TextIO, Tuple
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    _HAS_PYARROW = True
+except ImportError:  # pragma: no cover - depende do ambiente
+    _HAS_PYARROW = False
+
+# Força o emissor CSV mesmo com pyarrow disponível (compatibilidade com
+# ferramentas que leem trading_log.csv direto).
+LEGACY_CSV = False
+
+# Lote de trades mantido em memória antes de virar um row group.
+_TRADE_BATCH = 256
+
+# Template bytes do emissor CSV: um % binário por linha, sem csv.writer
+# (máquina de estados + passe de encoding Unicode) no caminho quente.
+_TRADE_FMT = b"%s,%s,%s,%.8f,%.8f,%.2f,%s\n"
+
+# Timestamp formatado em cache por segundo: strftime custa uma chamada
+# C com locale por invocação; dentro do mesmo segundo reutiliza.
+_last_ts = (0, b"")
+
+
+def _now_str() -> bytes:
+    global _last_ts
+    t = int(time.time())
+    if t != _last_ts[0]:
+        _last_ts = (
+            t,
+            datetime.fromtimestamp(t).strftime(
+                "%Y-%m-%d %H:%M:%S"
+            ).encode("ascii"),
+        )
+    return _last_ts[1]
+
+
+_HEADERS = {
+    "trading_log.csv": [
+        "timestamp", "symbol", "tipo", "preco", "quantidade",
+        "pnl", "motivo",
+    ],
+    "status_diario.csv": [
+        "data", "capital", "pnl_dia", "num_trades", "win_rate",
+    ],
+    "alertas.csv": ["timestamp", "nivel", "mensagem"],
+}
+
+
+class LogManager:
+    """Grava eventos do bot em Parquet (trades) e CSV (status/alertas)."""
+
+    def __init__(self, log_dir: str = "logs"):
+        self.log_dir = log_dir
+        os.makedirs(log_dir, exist_ok=True)
+        # (handle, writer) por arquivo CSV, abertos sob demanda e
+        # fechados em atexit.
+        self._sinks: Dict[str, Tuple[TextIO, csv.writer]] = {}
+
+        self._parquet = _HAS_PYARROW and not LEGACY_CSV
+        if self._parquet:
+            self._pq_writer = None
+            # Diretório-dataset: cada execução grava seu próprio part
+            # file, então um restart nunca toca nos dados anteriores.
+            self._pq_dir = os.path.join(log_dir, "trading_log.parquet")
+            self._migrar_parquet_legado()
+            self._trade_cols: Dict[str, List] = {
+                "timestamp": [], "symbol": [], "tipo": [], "preco": [],
+                "quantidade": [], "pnl": [], "motivo": [],
+            }
+        # Handle binário do trading_log.csv (fallback), aberto uma vez.
+        self._trade_fh = None
+
+        # Resumo do dia mantido incrementalmente (O(1) por consulta);
+        # num restart no meio do dia, o estado é recuperado do fim do
+        # arquivo do sink ativo (Parquet ou CSV).
+        self._resumo_data = datetime.now().date()
+        self._resumo_trades = 0
+        self._resumo_pnl = 0.0
+        self._seed_resumo()
+        atexit.register(self.close)
+
+    def _writer(self, filename: str):
+        sink = self._sinks.get(filename)
+        if sink is not None:
+            return sink[1]
+        path = os.path.join(self.log_dir, filename)
+        novo = not os.path.exists(path) or os.path.getsize(path) == 0
+        fh = open(path, "a", buffering=1 << 16, newline="",
+                  encoding="utf-8")
+        writer = csv.writer(fh)
+        if novo:
+            writer.writerow(_HEADERS[filename])
+        self._sinks[filename] = (fh, writer)
+        return writer
+
+    # ------------------------------------------------------------------
+    # Trades
+    # ------------------------------------------------------------------
+
+    def registrar_trade(self, symbol: str, tipo: str, preco: float,
+                        quantidade: float, pnl: float = 0.0,
+                        motivo: str = ""):
+        if self._parquet:
+            cols = self._trade_cols
+            cols["timestamp"].append(datetime.now())
+            cols["symbol"].append(symbol)
+            cols["tipo"].append(tipo)
+            cols["preco"].append(preco)
+            cols["quantidade"].append(quantidade)
+            cols["pnl"].append(pnl)
+            cols["motivo"].append(motivo)
+            if len(cols["timestamp"]) >= _TRADE_BATCH:
+                self._flush_trades()
+            self._conta_trade(pnl)
+            return
+        # Fallback CSV: formatação % binária direto no handle bufferizado.
+        if self._trade_fh is None:
+            path = os.path.join(self.log_dir, "trading_log.csv")
+            novo = not os.path.exists(path) or os.path.getsize(path) == 0
+            self._trade_fh = open(path, "ab", buffering=1 << 16)
+            if novo:
+                header = ",".join(_HEADERS["trading_log.csv"]) + "\n"
+                self._trade_fh.write(header.encode("utf-8"))
+        self._trade_fh.write(_TRADE_FMT % (
+            _now_str(),
+            symbol.encode("utf-8"), tipo.encode("utf-8"),
+            preco, quantidade, pnl, motivo.encode("utf-8"),
+        ))
+        self._conta_trade(pnl)
+
+    def _rola_dia(self):
+        hoje = datetime.now().date()
+        if hoje != self._resumo_data:
+            self._resumo_data = hoje
+            self._resumo_trades = 0
+            self._resumo_pnl = 0.0
+
+    def _conta_trade(self, pnl: float):
+        self._rola_dia()
+        self._resumo_trades += 1
+        self._resumo_pnl += pnl
+
+    def _seed_resumo(self):
+        """Recupera o resumo de hoje do sink que realmente grava trades.
+
+        Com pyarrow ativo os trades nunca passam pelo CSV — varrer só o
+        trading_log.csv deixava o resumo zerado após restart.
+        """
+        if self._parquet:
+            self._seed_resumo_do_parquet()
+        else:
+            self._seed_resumo_do_csv()
+
+    def _migrar_parquet_legado(self):
+        """Converte o trading_log.parquet de arquivo único em dataset.
+
+        Versões antigas gravavam um único arquivo nesse caminho (e o
+        truncavam a cada restart); se ele ainda existir, vira o part
+        mais antigo do diretório em vez de ser descartado.
+        """
+        if not os.path.isfile(self._pq_dir):
+            return
+        legado = self._pq_dir + ".legado"
+        os.replace(self._pq_dir, legado)
+        os.makedirs(self._pq_dir)
+        os.replace(legado, os.path.join(
+            self._pq_dir, "part-00000000-000000-0.parquet"
+        ))
+
+    def _seed_resumo_do_parquet(self):
+        """Recupera o resumo de hoje do fim do dataset Parquet.
+
+        Percorre os part files do mais novo para o mais antigo (o nome
+        carrega o timestamp de início da execução) e, em cada um, os
+        row groups de trás para frente (só as colunas timestamp e pnl),
+        parando no primeiro grupo sem linha de hoje — o análogo colunar
+        da varredura reversa do CSV. Os parts das execuções anteriores
+        estão finalizados (writer fechado em atexit); um footer ausente
+        (queda no meio da escrita) só pula aquele part.
+        """
+        try:
+            parts = sorted(os.listdir(self._pq_dir), reverse=True)
+        except OSError:
+            return  # dataset ainda não existe
+        hoje = self._resumo_data
+        for nome in parts:
+            if not nome.endswith(".parquet"):
+                continue
+            try:
+                pf = pq.ParquetFile(os.path.join(self._pq_dir, nome))
+            except (OSError, pa.ArrowInvalid):
+                continue  # part truncado
+            for g in range(pf.num_row_groups - 1, -1, -1):
+                grupo = pf.read_row_group(g, columns=["timestamp", "pnl"])
+                achou = False
+                for ts, pnl in zip(grupo.column("timestamp").to_pylist(),
+                                   grupo.column("pnl").to_pylist()):
+                    if ts.date() == hoje:
+                        achou = True
+                        self._resumo_trades += 1
+                        self._resumo_pnl += pnl
+                if not achou:
+                    return
+
+    def _seed_resumo_do_csv(self):
+        """Recupera o resumo de hoje do fim do trading_log.csv.
+
+        mmap + rfind de b'\\n' de trás para frente, parando na primeira
+        linha de data anterior a hoje — tempo ~constante mesmo com
+        meses de histórico, sem DictReader linha a linha.
+        """
+        path = os.path.join(self.log_dir, "trading_log.csv")
+        try:
+            with open(path, "rb") as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):
+            return  # sem arquivo ou arquivo vazio
+        prefixo = self._resumo_data.isoformat().encode("ascii")
+        with mm:
+            fim = len(mm)
+            while fim > 0:
+                ini = mm.rfind(b"\n", 0, fim - 1) + 1
+                linha = mm[ini:fim].rstrip(b"\r\n")
+                if linha:
+                    if not linha.startswith(prefixo):
+                        break  # header ou dia anterior: nada antes é de hoje
+                    campos = linha.split(b",")
+                    try:
+                        self._resumo_pnl += float(campos[5])
+                        self._resumo_trades += 1
+                    except (IndexError, ValueError):
+                        pass  # linha truncada (queda no meio da escrita)
+                if ini == 0:
+                    break
+                fim = ini
+
+    def get_resumo_hoje(self) -> Dict[str, float]:
+        """Trades e PnL acumulados de hoje, em O(1)."""
+        self._rola_dia()
+        return {
+            "data": self._resumo_data.isoformat(),
+            "num_trades": self._resumo_trades,
+            "pnl_dia": round(self._resumo_pnl, 8),
+        }
+
+    def _flush_trades(self):
+        if not self._parquet or not self._trade_cols["timestamp"]:
+            return
+        table = pa.table(self._trade_cols)
+        if self._pq_writer is None:
+            # Part file próprio desta execução: nome com timestamp de
+            # início + pid, nada de truncar o histórico das anteriores.
+            os.makedirs(self._pq_dir, exist_ok=True)
+            nome = "part-%s-%d.parquet" % (
+                datetime.now().strftime("%Y%m%d-%H%M%S"), os.getpid()
+            )
+            self._pq_writer = pq.ParquetWriter(
+                os.path.join(self._pq_dir, nome), table.schema
+            )
+        self._pq_writer.write_table(table)
+        for col in self._trade_cols.values():
+            col.clear()
+
+    # ------------------------------------------------------------------
+    # Status e alertas
+    # ------------------------------------------------------------------
+
+    def registrar_status_diario(self, capital: float, pnl_dia: float,
+                                num_trades: int, win_rate: float):
+        self._writer("status_diario.csv").writerow([
+            datetime.now().date().isoformat(), f"{capital:.2f}",
+            f"{pnl_dia:.2f}", num_trades, f"{win_rate:.2f}",
+        ])
+        # Fronteira de dia: ponto natural para materializar os buffers.
+        self.flush()
+
+    def registrar_alerta(self, nivel: str, mensagem: str):
+        self._writer("alertas.csv").writerow([
+            _now_str().decode("ascii"), nivel, mensagem,
+        ])
+
+    def flush(self):
+        self._flush_trades()
+        if self._trade_fh is not None:
+            self._trade_fh.flush()
+        for fh, _ in self._sinks.values():
+            fh.flush()
+
+    def close(self):
+        if self._parquet:
+            self._flush_trades()
+            if self._pq_writer is not None:
+                self._pq_writer.close()
+                self._pq_writer = None
+        if self._trade_fh is not None:
+            try:
+                self._trade_fh.close()
+            except ValueError:
+                pass
+            self._trade_fh = None
+        for fh, _ in self._sinks.values():
+            try:
+                fh.close()
+            except ValueError:
+                pass  # já fechado
+        self._sinks.clear()
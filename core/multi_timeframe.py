@@ -0,0 +1,618 @@
+"""
+Estratégia multi-timeframe.
+
+Analisa cada símbolo em vários timeframes (RSI, MACD, EMAs, suporte e
+resistência), combina os sinais por peso e sugere stop-loss/take-profit.
+"""
+
+import asyncio
+import hashlib
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime
+from enum import Enum
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from ._mtf_kernels import (_ema, _ema_batch, _macd, _multi_ema, _rsi,
+                           _rsi_batch, _warmup)
+
+
+class Timeframe(Enum):
+    M1 = "1m"
+    M5 = "5m"
+    M15 = "15m"
+    H1 = "1h"
+    H4 = "4h"
+
+
+class Signal(Enum):
+    STRONG_SELL = -2
+    SELL = -1
+    NEUTRAL = 0
+    BUY = 1
+    STRONG_BUY = 2
+
+
+@dataclass(slots=True, frozen=True)
+class TimeframeAnalysis:
+    """Resultado da análise de um timeframe.
+
+    Slotted (sem __dict__ por instância — centenas ficam retidas no
+    cache de análises) e imutável, o que também a torna hashable. Os
+    valores numéricos são quantizados para np.float32 na construção:
+    3-4 dígitos significativos bastam para indicadores, e metade dos
+    bytes percorridos quando as análises são agregadas em lote.
+    """
+
+    timeframe: Timeframe
+    signal: int  # valor inteiro de Signal; o enum só aparece na borda da API
+    confidence: np.float32
+    rsi: np.float32
+    macd: np.float32
+    trend: str
+    support: Optional[np.float32]
+    resistance: Optional[np.float32]
+
+
+class MultiTimeframeStrategy:
+    """Combina sinais de vários timeframes num veredito único por símbolo."""
+
+    # Constantes de classe: evita reconstruir o dict/array a cada chamada
+    # de _generate_signal/_combine_signals.
+    _TF_MULT = {
+        Timeframe.M1: 0.7,
+        Timeframe.M5: 0.8,
+        Timeframe.M15: 0.9,
+        Timeframe.H1: 1.0,
+        Timeframe.H4: 1.1,
+    }
+    _SIGNAL_BINS = np.array([-1.5, -0.5, 0.5, 1.5], dtype=np.float32)
+    _SIGNAL_ORDER = (Signal.STRONG_SELL, Signal.SELL, Signal.NEUTRAL,
+                     Signal.BUY, Signal.STRONG_BUY)
+
+    def __init__(self):
+        _warmup()
+        self.timeframe_weights: Dict[Timeframe, float] = {
+            Timeframe.M1: 0.10,
+            Timeframe.M5: 0.15,
+            Timeframe.M15: 0.20,
+            Timeframe.H1: 0.25,
+            Timeframe.H4: 0.30,
+        }
+        # (símbolo, timeframe, período) -> (nº de preços vistos, último
+        # preço visto, valor da EMA) para atualização incremental O(1).
+        self.ema_state: Dict[Tuple[str, Timeframe, int],
+                             Tuple[int, float, float]] = {}
+        # Deques monotônicas por (símbolo, timeframe) para min/max móvel
+        # O(1) amortizado da janela de suporte/resistência.
+        self._sr_state: Dict[Tuple[str, Timeframe], tuple] = {}
+        # Ordem fixa dos timeframes e pesos pré-materializados em array,
+        # para a agregação vetorizada de _combine_signals.
+        self._tf_index: Dict[Timeframe, int] = {
+            tf: i for i, tf in enumerate(self.timeframe_weights)
+        }
+        self._weight_array = np.array(
+            list(self.timeframe_weights.values()), dtype=np.float32
+        )
+        self.analysis_cache: Dict[str, Dict[Timeframe, TimeframeAnalysis]] = {}
+        # símbolo -> (hash do conteúdo dos preços, expiração em ticks de
+        # time.monotonic_ns). O hash invalida o cache assim que os
+        # candles realmente mudam, mesmo dentro do TTL; a comparação de
+        # inteiros evita criar objetos datetime no caminho quente.
+        self.cache_expiry: Dict[str, Tuple[str, int]] = {}
+        self.cache_ttl_ns = 60_000_000_000
+        # símbolo -> (preço usado, dict de resultado completo) para o
+        # fast path de cache hit sem recomputar sinal/stop/take-profit.
+        self._last_result: Dict[str, Tuple[float, dict]] = {}
+
+    # ------------------------------------------------------------------
+    # Indicadores (kernels nativos em core/_mtf_kernels, JIT via numba)
+    # ------------------------------------------------------------------
+
+    def _calculate_rsi(self, prices: np.ndarray, period: int = 14) -> float:
+        """RSI sobre o último período."""
+        if len(prices) < period + 1:
+            return 50.0
+        return float(_rsi(np.asarray(prices, dtype=np.float32), period))
+
+    def _calculate_ema(self, prices: np.ndarray, period: int,
+                       state_key: Optional[Tuple[str, Timeframe]] = None) -> float:
+        """EMA do último preço.
+
+        Com state_key, guarda o valor da EMA entre chamadas e só aplica a
+        recorrência aos preços chegados desde a última análise — O(1) em
+        regime permanente, em vez de re-percorrer o histórico inteiro.
+        """
+        n = len(prices)
+        if n < period:
+            return float(prices[-1]) if n else 0.0
+
+        if state_key is not None:
+            key = (state_key[0], state_key[1], period)
+            state = self.ema_state.get(key)
+            if state is not None:
+                seen, last_price, ema = state
+                # Só reaproveita se o histórico realmente estende o que já
+                # foi visto (mesmo último preço na posição anterior).
+                if seen <= n and prices[seen - 1] == last_price:
+                    k = 2.0 / (period + 1)
+                    for price in prices[seen:]:
+                        ema = price * k + ema * (1.0 - k)
+                    self.ema_state[key] = (n, float(prices[-1]), ema)
+                    return float(ema)
+
+            ema = float(_ema(np.asarray(prices, dtype=np.float32), period))
+            self.ema_state[key] = (n, float(prices[-1]), ema)
+            return ema
+
+        return float(_ema(np.asarray(prices, dtype=np.float32), period))
+
+    def _calculate_macd(self, prices: np.ndarray) -> float:
+        """Linha MACD (EMA12 - EMA26), ambas as EMAs num único laço."""
+        if len(prices) < 26:
+            return 0.0
+        return float(_macd(np.asarray(prices, dtype=np.float32), 12, 26))
+
+    # Períodos de EMA usados por análise: MACD (12/26) e tendência (20/50).
+    _EMA_PERIODS = np.array([12, 26, 20, 50], dtype=np.int64)
+
+    def _calculate_emas(self, symbol: str, timeframe: Timeframe,
+                        prices: np.ndarray):
+        """EMAs 12/26/20/50 compartilhadas entre MACD e tendência.
+
+        Em regime permanente cada EMA avança incrementalmente só com os
+        preços novos; quando algum estado não casa com o histórico, as
+        quatro recorrências são recomputadas numa única passada fundida
+        (_multi_ema) em vez de quatro varreduras independentes.
+        """
+        n = len(prices)
+        incremental = True
+        for period in (12, 26, 20, 50):
+            state = self.ema_state.get((symbol, timeframe, period))
+            if (state is None or state[0] > n
+                    or prices[state[0] - 1] != state[1]):
+                incremental = False
+                break
+
+        if incremental:
+            return tuple(
+                self._calculate_ema(prices, period,
+                                    state_key=(symbol, timeframe))
+                for period in (12, 26, 20, 50)
+            )
+
+        emas = _multi_ema(
+            np.asarray(prices, dtype=np.float32), self._EMA_PERIODS
+        )
+        last_price = float(prices[-1])
+        for j, period in enumerate((12, 26, 20, 50)):
+            self.ema_state[(symbol, timeframe, period)] = (
+                n, last_price, float(emas[j])
+            )
+        return float(emas[0]), float(emas[1]), float(emas[2]), float(emas[3])
+
+    _SR_WINDOW = 50
+
+    def _find_support_resistance(self, symbol: str, timeframe: Timeframe,
+                                 prices: np.ndarray):
+        """Suporte/resistência: min/max móvel das últimas 50 barras.
+
+        Mantém duas deques monotônicas por (símbolo, timeframe), de modo
+        que barras novas custem O(1) amortizado em vez de re-escanear a
+        janela inteira a cada análise. Se o histórico não estende o que
+        já foi visto, as deques são reconstruídas a partir da janela.
+        """
+        n = len(prices)
+        if n < 10:
+            return None, None
+
+        key = (symbol, timeframe)
+        state = self._sr_state.get(key)
+        if state is not None:
+            min_dq, max_dq, seen, last_price = state
+            if seen <= n and prices[seen - 1] == last_price:
+                start = seen
+            else:
+                state = None
+        if state is None:
+            min_dq, max_dq = deque(), deque()
+            start = max(0, n - self._SR_WINDOW)
+
+        for i in range(start, n):
+            price = float(prices[i])
+            while min_dq and min_dq[-1][1] >= price:
+                min_dq.pop()
+            min_dq.append((i, price))
+            while max_dq and max_dq[-1][1] <= price:
+                max_dq.pop()
+            max_dq.append((i, price))
+
+        low = n - self._SR_WINDOW
+        while min_dq[0][0] < low:
+            min_dq.popleft()
+        while max_dq[0][0] < low:
+            max_dq.popleft()
+
+        self._sr_state[key] = (min_dq, max_dq, n, float(prices[-1]))
+        return min_dq[0][1], max_dq[0][1]
+
+    # ------------------------------------------------------------------
+    # Análise
+    # ------------------------------------------------------------------
+
+    async def analyze_symbol(self, symbol: str, current_price: float,
+                             price_data: Dict[Timeframe, np.ndarray]) -> dict:
+        """Analisa o símbolo em todos os timeframes disponíveis.
+
+        Os preços são normalizados uma única vez na borda para ndarrays
+        float32 contíguos (4 bytes por barra, sem floats Python boxed);
+        todos os indicadores e o hash de cache operam sobre esses
+        arrays.
+        """
+        price_data = {
+            tf: np.ascontiguousarray(p, dtype=np.float32)
+            for tf, p in price_data.items()
+        }
+        price_hash = self._price_hash(price_data)
+        cache_valid = self._is_cache_valid(symbol, price_hash)
+
+        # Fast path: cache vigente e preço praticamente igual (jitter
+        # < 0,01%) — devolve o resultado completo já montado, sem refazer
+        # combinação de sinais nem stop/take-profit.
+        if cache_valid:
+            last = self._last_result.get(symbol)
+            if last is not None:
+                last_price, last_result = last
+                if abs(current_price - last_price) / last_price < 1e-4:
+                    return last_result
+
+        if not cache_valid:
+            # Os timeframes são independentes, mas _analyze_timeframe é
+            # CPU puro (sem await) — corrotinas nuas num gather rodariam
+            # em sequência. to_thread despacha cada timeframe para o
+            # pool de threads e, como os kernels são nogil, o trecho
+            # numérico sobrepõe nos núcleos (latência = max, não soma).
+            timeframes = []
+            tasks = []
+            for timeframe in self.timeframe_weights:
+                if timeframe not in price_data:
+                    continue
+                prices = price_data[timeframe]
+                if len(prices) < 50:
+                    continue
+                timeframes.append(timeframe)
+                tasks.append(asyncio.to_thread(
+                    self._analyze_timeframe,
+                    symbol, timeframe, current_price, prices,
+                ))
+
+            results = await asyncio.gather(*tasks)
+            self.analysis_cache[symbol] = dict(zip(timeframes, results))
+            self.cache_expiry[symbol] = (
+                price_hash, time.monotonic_ns() + self.cache_ttl_ns
+            )
+
+        analyses = self.analysis_cache.get(symbol, {})
+        if not analyses:
+            return {
+                "signal": Signal.NEUTRAL,
+                "confidence": 0.0,
+                "stop_loss": None,
+                "take_profit": None,
+                "risk_reward": None,
+                "analyses": {},
+            }
+
+        combined_signal, confidence, risk_reward = self._combine_signals(
+            analyses
+        )
+        stop_loss = self._calculate_stop_loss(current_price, analyses)
+        take_profit = self._calculate_take_profit(current_price, analyses)
+
+        result = {
+            "signal": combined_signal,
+            "confidence": confidence,
+            "stop_loss": stop_loss,
+            "take_profit": take_profit,
+            "risk_reward": risk_reward,
+            "analyses": analyses,
+        }
+        self._last_result[symbol] = (current_price, result)
+        return result
+
+    async def analyze_batch(self, symbols: list,
+                            prices_matrix: Dict[Timeframe, np.ndarray]) -> dict:
+        """Analisa uma watchlist inteira como operação matricial.
+
+        prices_matrix[tf] tem forma (n_símbolos, n_barras); os kernels
+        de lote (prange sobre o eixo de símbolos) computam RSI/EMAs de
+        todas as linhas de uma vez e suporte/resistência viram reduções
+        min/max por eixo. O preço atual de cada símbolo é a última barra
+        do timeframe mais fino presente.
+        """
+        per_tf = {}
+        current_prices = None
+        for timeframe in self.timeframe_weights:
+            matrix = prices_matrix.get(timeframe)
+            if matrix is None:
+                continue
+            matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+            if matrix.shape[1] < 50:
+                continue
+            if current_prices is None:
+                current_prices = matrix[:, -1]
+            ema_12 = _ema_batch(matrix, 12)
+            ema_26 = _ema_batch(matrix, 26)
+            ema_20 = _ema_batch(matrix, 20)
+            ema_50 = _ema_batch(matrix, 50)
+            window = matrix[:, -self._SR_WINDOW:]
+            per_tf[timeframe] = (
+                _rsi_batch(matrix, 14),
+                ema_12 - ema_26,
+                ema_20,
+                ema_50,
+                window.min(axis=1),
+                window.max(axis=1),
+            )
+
+        results = {}
+        if current_prices is None:
+            return results
+
+        for idx, symbol in enumerate(symbols):
+            current_price = float(current_prices[idx])
+            analyses: Dict[Timeframe, TimeframeAnalysis] = {}
+            for timeframe, cols in per_tf.items():
+                rsi = float(cols[0][idx])
+                macd = float(cols[1][idx])
+                ema_20 = float(cols[2][idx])
+                ema_50 = float(cols[3][idx])
+                support = float(cols[4][idx])
+                resistance = float(cols[5][idx])
+
+                if ema_20 > ema_50 and current_price > ema_20:
+                    trend = "alta"
+                elif ema_20 < ema_50 and current_price < ema_20:
+                    trend = "baixa"
+                else:
+                    trend = "lateral"
+
+                signal, confidence = self._generate_signal(
+                    timeframe, current_price, rsi, macd, ema_20, ema_50,
+                    support, resistance, trend,
+                )
+                analyses[timeframe] = TimeframeAnalysis(
+                    timeframe=timeframe,
+                    signal=signal,
+                    confidence=np.float32(confidence),
+                    rsi=np.float32(rsi),
+                    macd=np.float32(macd),
+                    trend=trend,
+                    support=np.float32(support),
+                    resistance=np.float32(resistance),
+                )
+
+            combined_signal, confidence, risk_reward = self._combine_signals(
+                analyses
+            )
+            results[symbol] = {
+                "signal": combined_signal,
+                "confidence": confidence,
+                "stop_loss": self._calculate_stop_loss(current_price, analyses),
+                "take_profit": self._calculate_take_profit(
+                    current_price, analyses
+                ),
+                "risk_reward": risk_reward,
+                "analyses": analyses,
+            }
+        return results
+
+    def _analyze_timeframe(self, symbol: str, timeframe: Timeframe,
+                           current_price: float,
+                           prices: np.ndarray) -> TimeframeAnalysis:
+        """Analisa um único timeframe (síncrono; roda em thread de pool).
+
+        Cada tarefa escreve em chaves (símbolo, timeframe) distintas de
+        ema_state/_sr_state, então as threads não disputam entradas.
+        """
+        rsi = self._calculate_rsi(prices)
+        ema_12, ema_26, ema_20, ema_50 = self._calculate_emas(
+            symbol, timeframe, prices
+        )
+        macd = ema_12 - ema_26
+        support, resistance = self._find_support_resistance(
+            symbol, timeframe, prices
+        )
+
+        if ema_20 > ema_50 and current_price > ema_20:
+            trend = "alta"
+        elif ema_20 < ema_50 and current_price < ema_20:
+            trend = "baixa"
+        else:
+            trend = "lateral"
+
+        signal, confidence = self._generate_signal(
+            timeframe, current_price, rsi, macd, ema_20, ema_50,
+            support, resistance, trend,
+        )
+
+        return TimeframeAnalysis(
+            timeframe=timeframe,
+            signal=signal,
+            confidence=np.float32(confidence),
+            rsi=np.float32(rsi),
+            macd=np.float32(macd),
+            trend=trend,
+            support=None if support is None else np.float32(support),
+            resistance=None if resistance is None else np.float32(resistance),
+        )
+
+    def _generate_signal(self, timeframe: Timeframe, current_price: float,
+                         rsi: float, macd: float, ema_20: float, ema_50: float,
+                         support: Optional[float], resistance: Optional[float],
+                         trend: str):
+        """Pondera os indicadores do timeframe num sinal e confiança.
+
+        Cada indicador ocupa um slot fixo (rsi, macd, tendência, suporte,
+        resistência) em dois arrays pré-alocados; os valores são
+        calculados sem desvios (np.select/aritmética booleana) e os slots
+        inativos ficam com confiança zero — nenhuma lista é construída.
+        """
+        signals = np.zeros(5, dtype=np.float32)
+        confidences = np.zeros(5, dtype=np.float32)
+
+        signals[0] = np.select(
+            [rsi < 30, rsi < 40, rsi > 70, rsi > 60],
+            [1.0, 0.5, -1.0, -0.5], 0.0,
+        )
+        confidences[0] = np.select(
+            [rsi < 30, rsi < 40, rsi > 70, rsi > 60],
+            [0.8, 0.5, 0.8, 0.5], 0.0,
+        )
+
+        signals[1] = np.sign(macd) * 0.5
+        confidences[1] = 0.4 * (macd != 0)
+
+        signals[2] = (trend == "alta") - (trend == "baixa")
+        confidences[2] = 0.6 * (trend != "lateral")
+
+        near_support = support is not None and current_price <= support * 1.01
+        signals[3] = 1.0 * near_support
+        confidences[3] = 0.7 * near_support
+
+        near_resistance = (
+            resistance is not None and current_price >= resistance * 0.99
+        )
+        signals[4] = -1.0 * near_resistance
+        confidences[4] = 0.7 * near_resistance
+
+        active = confidences > 0
+        n_active = int(active.sum())
+        if n_active == 0:
+            return 0, 0.0
+
+        multiplier = self._TF_MULT.get(timeframe, 1.0)
+
+        weighted = float((signals * confidences).sum())
+        total_conf = float(confidences.sum())
+        score = (weighted / total_conf) * multiplier
+        confidence = min(total_conf / n_active, 1.0)
+
+        if score >= 0.75:
+            return 2, confidence
+        if score >= 0.25:
+            return 1, confidence
+        if score <= -0.75:
+            return -2, confidence
+        if score <= -0.25:
+            return -1, confidence
+        return 0, confidence
+
+    def _combine_signals(self, analyses: Dict[Timeframe, TimeframeAnalysis]):
+        """Combina os sinais dos timeframes pelos pesos configurados.
+
+        Os sinais/confianças são despejados em arrays de tamanho fixo e
+        agregados num único produto vetorizado, em vez de acumular em
+        aritmética Python elemento a elemento. A razão risco/retorno sai
+        da mesma passada (fusão de kernel: os arrays já estão quentes),
+        dispensando uma segunda varredura das análises.
+        """
+        n = len(self._weight_array)
+        signals = np.zeros(n, dtype=np.float32)
+        confidences = np.zeros(n, dtype=np.float32)
+        mask = np.zeros(n, dtype=bool)
+        for timeframe, analysis in analyses.items():
+            i = self._tf_index[timeframe]
+            signals[i] = analysis.signal
+            confidences[i] = analysis.confidence
+            mask[i] = True
+
+        total_weight = float(self._weight_array[mask].sum())
+        if total_weight == 0:
+            return Signal.NEUTRAL, 0.0, None
+
+        weighted_sum = float((signals * confidences * self._weight_array).sum())
+        final_signal_value = weighted_sum / total_weight
+
+        signal = self._SIGNAL_ORDER[
+            int(np.searchsorted(self._SIGNAL_BINS, final_signal_value))
+        ]
+        confidence = min(abs(final_signal_value), 1.0)
+        avg_confidence = float(confidences[mask].mean())
+        risk_reward = 2.0 * (0.5 + avg_confidence)
+        return signal, confidence, risk_reward
+
+    def _calculate_stop_loss(self, current_price: float,
+                             analyses: Dict[Timeframe, TimeframeAnalysis]):
+        """Stop-loss no suporte mais próximo abaixo do preço (com folga)."""
+        supports = np.array(
+            [a.support for a in analyses.values() if a.support is not None],
+            dtype=np.float32,
+        )
+        below = supports[supports < current_price * 0.98]
+        if below.size:
+            return float(below.max())
+        return current_price * 0.97
+
+    def _calculate_take_profit(self, current_price: float,
+                               analyses: Dict[Timeframe, TimeframeAnalysis]):
+        """Take-profit na resistência mais próxima acima do preço."""
+        resistances = np.array(
+            [a.resistance for a in analyses.values()
+             if a.resistance is not None],
+            dtype=np.float32,
+        )
+        above = resistances[resistances > current_price * 1.02]
+        if above.size:
+            return float(above.min())
+        return current_price * 1.05
+
+    # ------------------------------------------------------------------
+    # Cache / sessão
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _price_hash(price_data: Dict[Timeframe, np.ndarray]) -> str:
+        """Hash curto do conteúdo dos preços de todos os timeframes."""
+        digest = hashlib.blake2b(digest_size=8)
+        for timeframe in sorted(price_data, key=lambda tf: tf.value):
+            digest.update(price_data[timeframe].tobytes())
+        return digest.hexdigest()
+
+    def _is_cache_valid(self, symbol: str, price_hash: str) -> bool:
+        entry = self.cache_expiry.get(symbol)
+        if entry is None:
+            return False
+        cached_hash, expiry_ns = entry
+        return cached_hash == price_hash and time.monotonic_ns() < expiry_ns
+
+    _session_cache: Optional[Tuple[int, dict]] = None
+
+    def get_trading_session_info(self) -> dict:
+        """Informações da sessão atual (horário, liquidez esperada).
+
+        O resultado só muda na virada da hora; é cacheado por alguns
+        segundos via relógio monotônico.
+        """
+        now_ns = time.monotonic_ns()
+        if (self._session_cache is not None
+                and now_ns < self._session_cache[0]):
+            return self._session_cache[1]
+
+        now = datetime.now()
+        hour = now.hour
+        if 8 <= hour < 17:
+            session = "europeia/americana"
+            liquidity = "alta"
+        elif 0 <= hour < 8:
+            session = "asiática"
+            liquidity = "média"
+        else:
+            session = "fechamento"
+            liquidity = "baixa"
+        info = {"session": session, "liquidity": liquidity, "hour": hour}
+        self._session_cache = (now_ns + 5_000_000_000, info)
+        return info
@@ -0,0 +1,806 @@
+"""
+Gestão de portfólio.
+
+Controla posições abertas, caixa disponível, histórico de trades e
+métricas agregadas (Sharpe, drawdown, win rate), além dos limites de
+risco por correlação entre símbolos.
+"""
+
+import logging
+import os
+import sys
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from enum import Enum
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import orjson
+
+from ._portfolio_kernels import _sweep
+
+logger = logging.getLogger(__name__)
+
+
+class PositionType(Enum):
+    LONG = "LONG"
+    SHORT = "SHORT"
+
+
+@dataclass(slots=True)
+class Position:
+    """Visão de uma posição aberta.
+
+    O armazenamento primário são os arrays SoA do PortfolioManager;
+    instâncias de Position são snapshots materializados para chamadores
+    externos.
+    """
+
+    symbol: str
+    position_type: PositionType
+    entry_price: float
+    quantity: float
+    entry_time: datetime
+    stop_loss: float
+    take_profit: float
+    unrealized_pnl: float = 0.0
+    direction: int = field(init=False)
+
+    def __post_init__(self):
+        # +1 para LONG, -1 para SHORT: o PnL vira uma multiplicação
+        # pelo sinal, sem branch por tick.
+        self.direction = 1 if self.position_type == PositionType.LONG else -1
+
+    def update_unrealized_pnl(self, current_price: float) -> float:
+        self.unrealized_pnl = (
+            self.direction * (current_price - self.entry_price) * self.quantity
+        )
+        return self.unrealized_pnl
+
+
+@dataclass(slots=True)
+class PortfolioMetrics:
+    """Métricas agregadas do portfólio."""
+
+    total_value: float = 0.0
+    total_pnl: float = 0.0
+    win_rate: float = 0.0
+    sharpe_ratio: float = 0.0
+    max_drawdown: float = 0.0
+    profit_factor: float = 0.0
+    num_trades: int = 0
+
+
+class PortfolioManager:
+    """Administra posições, caixa e risco agregado do portfólio."""
+
+    def __init__(self, initial_capital: float = 10000.0,
+                 max_positions: int = 10):
+        self.initial_capital = initial_capital
+        self.available_cash = initial_capital
+        self.max_positions = max_positions
+
+        # Posições em SoA: colunas numéricas contíguas dimensionadas
+        # para max_positions, indexadas por {símbolo: linha}. Fechamento
+        # faz swap-pop da última linha. Toda a matemática por tick roda
+        # vetorizada nesses arrays; objetos Position só existem como
+        # snapshots via o property ``positions``.
+        self._pos_symbols: List[str] = []
+        self._row_of: Dict[str, int] = {}
+        self._entry_arr = np.zeros(max_positions, dtype=np.float64)
+        self._qty_arr = np.zeros(max_positions, dtype=np.float64)
+        self._sl_arr = np.zeros(max_positions, dtype=np.float64)
+        self._tp_arr = np.zeros(max_positions, dtype=np.float64)
+        self._pnl_arr = np.zeros(max_positions, dtype=np.float64)
+        self._dir_arr = np.zeros(max_positions, dtype=np.float64)
+        self._islong_arr = np.zeros(max_positions, dtype=np.int8)
+        self._ptype_rows: List[PositionType] = []
+        self._entry_time_rows: List[datetime] = []
+
+        # Histórico de trades em colunas (SoA): campos numéricos em
+        # arrays NumPy com crescimento geométrico, campos-objeto em
+        # listas. Nada de um dict de 11 chaves alocado por fechamento;
+        # o property trade_history materializa os dicts sob demanda.
+        self._trade_capacity = 256
+        self._trade_count = 0
+        self._trade_pnl = np.empty(self._trade_capacity, dtype=np.float64)
+        self._trade_pnl_pct = np.empty(self._trade_capacity, dtype=np.float64)
+        self._trade_entry_price = np.empty(
+            self._trade_capacity, dtype=np.float64
+        )
+        self._trade_exit_price = np.empty(
+            self._trade_capacity, dtype=np.float64
+        )
+        self._trade_qty = np.empty(self._trade_capacity, dtype=np.float64)
+        self._trade_symbol: List[str] = []
+        self._trade_type: List[str] = []
+        self._trade_entry_time: List[datetime] = []
+        self._trade_exit_time: List[datetime] = []
+        self._trade_reason: List[str] = []
+        # deque com maxlen: append O(1) com descarte automático do mais
+        # antigo, sem o rebuild por fatia a cada tick.
+        self.equity_curve: deque = deque(
+            [(datetime.now(), initial_capital)], maxlen=1000
+        )
+
+        # Valores diários num ring buffer fixo, com acumuladores de
+        # retorno (soma, soma de quadrados) mantidos na inserção: o
+        # Sharpe sai dos acumuladores em O(1), sem reconstruir a lista
+        # de retornos a cada consulta.
+        self._dv_capacity = 365
+        self._dv_buf = np.empty(self._dv_capacity, dtype=np.float64)
+        self._dv_head = 0
+        self._dv_count = 0
+        self._ret_buf = np.empty(self._dv_capacity, dtype=np.float64)
+        self._ret_head = 0
+        self._ret_count = 0
+        self._ret_sum = 0.0
+        self._ret_sq_sum = 0.0
+        self._last_daily_value: Optional[float] = None
+        self.record_daily_value(initial_capital)
+
+        self.max_position_pct = 0.20
+        self.max_correlation_risk = 0.45
+
+        # Correlações conhecidas entre pares (simétricas); pares ausentes
+        # assumem 0.3.
+        self.correlations: Dict[Tuple[str, str], float] = {
+            ("BTCUSDT", "ETHUSDT"): 0.85,
+            ("BTCUSDT", "BNBUSDT"): 0.70,
+            ("ETHUSDT", "BNBUSDT"): 0.72,
+            ("BTCUSDT", "SOLUSDT"): 0.65,
+            ("ETHUSDT", "SOLUSDT"): 0.68,
+        }
+
+        # Matriz densa de correlação indexada por id inteiro: a consulta
+        # vira um load de array em vez de ordenar/hashear uma tupla de
+        # strings por par a cada checagem de risco.
+        symbols = sorted({s for pair in self.correlations for s in pair})
+        # Símbolos internados: lookups nos dicts quentes comparam
+        # ponteiro antes de hashear a string inteira.
+        self._sym_to_idx: Dict[str, int] = {
+            sys.intern(s): i for i, s in enumerate(symbols)
+        }
+        n_syms = len(symbols)
+        self._corr_mat = np.full((n_syms, n_syms), 0.3, dtype=np.float32)
+        np.fill_diagonal(self._corr_mat, 1.0)
+        for (a, b), corr in self.correlations.items():
+            i, j = self._sym_to_idx[a], self._sym_to_idx[b]
+            self._corr_mat[i, j] = corr
+            self._corr_mat[j, i] = corr
+
+        # Acumuladores incrementais de estatísticas de trades: mantidos
+        # em close_position para que win rate / profit factor não
+        # precisem re-escanear o histórico inteiro a cada tick.
+        self._wins = 0
+        self._gross_profit = 0.0
+        self._gross_loss = 0.0
+
+        # Somas incrementais do valor do portfólio: custo das posições
+        # mantido em open/close, PnL não realizado renovado uma vez por
+        # tick em update_positions. get_total_portfolio_value vira O(1)
+        # em vez de re-somar as posições a cada chamada.
+        self._cost_basis_sum = 0.0
+        self._unrealized_sum = 0.0
+
+        # Função de tick especializada (gerada por exec) para livros
+        # pequenos; regenerada a cada open/close.
+        self._tick_fn: Optional[Callable] = None
+
+        # Flags de invalidação: win rate / profit factor só mudam em
+        # close_position, drawdown só quando a curva de capital recebe
+        # um valor novo. Fora isso, calculate_portfolio_metrics devolve
+        # os valores em cache.
+        self._trades_dirty = True
+        self._equity_dirty = True
+        self._cached_win_rate = 0.0
+        self._cached_profit_factor = 0.0
+        self._cached_max_dd = 0.0
+        self._last_equity_value = initial_capital
+
+        self.metrics = PortfolioMetrics(total_value=initial_capital)
+
+    # ------------------------------------------------------------------
+    # Armazenamento SoA
+    # ------------------------------------------------------------------
+
+    @property
+    def positions(self) -> Dict[str, Position]:
+        """Snapshots Position por símbolo, materializados sob demanda."""
+        return {
+            symbol: self._position_at(row)
+            for symbol, row in self._row_of.items()
+        }
+
+    def _position_at(self, row: int) -> Position:
+        position = Position(
+            symbol=self._pos_symbols[row],
+            position_type=self._ptype_rows[row],
+            entry_price=float(self._entry_arr[row]),
+            quantity=float(self._qty_arr[row]),
+            entry_time=self._entry_time_rows[row],
+            stop_loss=float(self._sl_arr[row]),
+            take_profit=float(self._tp_arr[row]),
+        )
+        position.unrealized_pnl = float(self._pnl_arr[row])
+        return position
+
+    def _insert_position(self, symbol: str, position_type: PositionType,
+                         entry_price: float, quantity: float,
+                         entry_time: datetime, stop_loss: float,
+                         take_profit: float):
+        symbol = sys.intern(symbol)
+        row = len(self._pos_symbols)
+        self._pos_symbols.append(symbol)
+        self._row_of[symbol] = row
+        self._entry_arr[row] = entry_price
+        self._qty_arr[row] = quantity
+        self._sl_arr[row] = stop_loss
+        self._tp_arr[row] = take_profit
+        self._pnl_arr[row] = 0.0
+        is_long = position_type == PositionType.LONG
+        self._dir_arr[row] = 1.0 if is_long else -1.0
+        self._islong_arr[row] = 1 if is_long else 0
+        self._ptype_rows.append(position_type)
+        self._entry_time_rows.append(entry_time)
+
+    def _remove_row(self, row: int):
+        """Swap-pop: a última linha ocupa a vaga, sem buraco no meio."""
+        last = len(self._pos_symbols) - 1
+        if row != last:
+            moved = self._pos_symbols[last]
+            self._pos_symbols[row] = moved
+            self._row_of[moved] = row
+            self._entry_arr[row] = self._entry_arr[last]
+            self._qty_arr[row] = self._qty_arr[last]
+            self._sl_arr[row] = self._sl_arr[last]
+            self._tp_arr[row] = self._tp_arr[last]
+            self._pnl_arr[row] = self._pnl_arr[last]
+            self._dir_arr[row] = self._dir_arr[last]
+            self._islong_arr[row] = self._islong_arr[last]
+            self._ptype_rows[row] = self._ptype_rows[last]
+            self._entry_time_rows[row] = self._entry_time_rows[last]
+        self._pos_symbols.pop()
+        self._ptype_rows.pop()
+        self._entry_time_rows.pop()
+
+    # ------------------------------------------------------------------
+    # Risco
+    # ------------------------------------------------------------------
+
+    def _get_correlation(self, sym1: str, sym2: str) -> float:
+        i = self._sym_to_idx.get(sym1)
+        j = self._sym_to_idx.get(sym2)
+        if i is None or j is None:
+            return 0.3
+        return float(self._corr_mat[i, j])
+
+    def _calculate_correlation_risk(self, symbol: str, position_size: float,
+                                    total_value: float) -> float:
+        """Risco de correlação da posição candidata contra o portfólio.
+
+        Pesos e correlações das posições existentes são materializados em
+        arrays e reduzidos com um único produto escalar, em vez de
+        acumular par a par em Python. ``total_value`` vem do chamador
+        para não recomputar o valor do portfólio dentro da checagem.
+        """
+        n = len(self._pos_symbols)
+        if n == 0:
+            return 0.0
+        if total_value <= 0:
+            return 0.0
+
+        notionals = self._entry_arr[:n] * self._qty_arr[:n]
+        weights = notionals / total_value
+        i = self._sym_to_idx.get(symbol)
+        if i is not None and all(
+            s in self._sym_to_idx for s in self._pos_symbols
+        ):
+            # Linha da matriz indexada de uma vez só.
+            idx = np.fromiter(
+                (self._sym_to_idx[s] for s in self._pos_symbols),
+                dtype=np.intp, count=n,
+            )
+            corr_vec = self._corr_mat[i, idx].astype(np.float64)
+        else:
+            corr_vec = np.array(
+                [self._get_correlation(symbol, s)
+                 for s in self._pos_symbols],
+                dtype=np.float64,
+            )
+
+        new_weight = position_size / total_value
+        return float(new_weight * np.abs(corr_vec).dot(weights))
+
+    def can_open_position(self, symbol: str, position_size: float) -> bool:
+        """Verifica limites de quantidade, caixa e correlação."""
+        if symbol in self._row_of:
+            return False
+        if len(self._pos_symbols) >= self.max_positions:
+            return False
+        if position_size > self.available_cash:
+            return False
+
+        total_value = self.get_total_portfolio_value()
+        if position_size > total_value * self.max_position_pct:
+            return False
+
+        corr_risk = self._calculate_correlation_risk(
+            symbol, position_size, total_value
+        )
+        if corr_risk > self.max_correlation_risk:
+            return False
+        return True
+
+    # ------------------------------------------------------------------
+    # Posições
+    # ------------------------------------------------------------------
+
+    def open_position(self, symbol: str, position_type: PositionType,
+                      entry_price: float, quantity: float,
+                      stop_loss: float, take_profit: float) -> bool:
+        """Abre uma posição nova, se os limites de risco permitirem."""
+        cost = entry_price * quantity
+        if not self.can_open_position(symbol, cost):
+            return False
+
+        self._insert_position(
+            symbol, position_type, entry_price, quantity,
+            datetime.now(), stop_loss, take_profit,
+        )
+        self.available_cash -= cost
+        self._cost_basis_sum += cost
+        self._rebuild_tick_fn()
+
+        # Formatação %: os argumentos só são formatados se DEBUG estiver
+        # habilitado — em backtest o log nem toca nas strings.
+        logger.debug(
+            "🟢 Posição %s aberta em %s preco=%.4f qty=%.6f "
+            "stop=%.4f alvo=%.4f",
+            position_type.value, symbol, entry_price, quantity,
+            stop_loss, take_profit,
+        )
+        return True
+
+    def close_position(self, symbol: str, exit_price: float,
+                       reason: str = "Manual",
+                       _now: Optional[datetime] = None) -> Optional[dict]:
+        """Fecha a posição do símbolo e registra o trade.
+
+        ``_now`` permite reaproveitar o timestamp do tick corrente
+        (update_positions lê o relógio uma vez por varredura, não por
+        fechamento).
+        """
+        row = self._row_of.pop(symbol, None)
+        if row is None:
+            return None
+
+        entry_price = float(self._entry_arr[row])
+        quantity = float(self._qty_arr[row])
+        direction = float(self._dir_arr[row])
+        unrealized = float(self._pnl_arr[row])
+        position_type = self._ptype_rows[row]
+        entry_time = self._entry_time_rows[row]
+        self._remove_row(row)
+
+        pnl = direction * (exit_price - entry_price) * quantity
+
+        cost = entry_price * quantity
+        self.available_cash += cost + pnl
+        self._cost_basis_sum -= cost
+        self._unrealized_sum -= unrealized
+        self._rebuild_tick_fn()
+
+        exit_time = _now if _now is not None else datetime.now()
+        pnl_pct = pnl / cost * 100 if cost else 0.0
+
+        i = self._trade_count
+        if i == self._trade_capacity:
+            self._grow_trade_arrays()
+        self._trade_pnl[i] = pnl
+        self._trade_pnl_pct[i] = pnl_pct
+        self._trade_entry_price[i] = entry_price
+        self._trade_exit_price[i] = exit_price
+        self._trade_qty[i] = quantity
+        self._trade_symbol.append(symbol)
+        self._trade_type.append(position_type.value)
+        self._trade_entry_time.append(entry_time)
+        self._trade_exit_time.append(exit_time)
+        self._trade_reason.append(reason)
+        self._trade_count = i + 1
+
+        if pnl > 0:
+            self._wins += 1
+            self._gross_profit += pnl
+        elif pnl < 0:
+            self._gross_loss -= pnl
+        self._trades_dirty = True
+
+        logger.debug(
+            "🔴 Posição fechada em %s (%s) %s PnL=%.2f (%.2f%%)",
+            symbol, reason, "💚" if pnl >= 0 else "💔",
+            pnl, pnl_pct,
+        )
+        return self._materialize_trade(i)
+
+    def _grow_trade_arrays(self):
+        """Dobra a capacidade das colunas numéricas do histórico."""
+        new_cap = self._trade_capacity * 2
+        for name in ("_trade_pnl", "_trade_pnl_pct", "_trade_entry_price",
+                     "_trade_exit_price", "_trade_qty"):
+            old = getattr(self, name)
+            new = np.empty(new_cap, dtype=np.float64)
+            new[:self._trade_count] = old[:self._trade_count]
+            setattr(self, name, new)
+        self._trade_capacity = new_cap
+
+    def _materialize_trade(self, i: int) -> dict:
+        """Monta o dict de um trade a partir das colunas."""
+        entry_time = self._trade_entry_time[i]
+        exit_time = self._trade_exit_time[i]
+        return {
+            "symbol": self._trade_symbol[i],
+            "type": self._trade_type[i],
+            "entry_price": float(self._trade_entry_price[i]),
+            "exit_price": float(self._trade_exit_price[i]),
+            "quantity": float(self._trade_qty[i]),
+            "pnl": float(self._trade_pnl[i]),
+            "pnl_pct": float(self._trade_pnl_pct[i]),
+            "entry_time": entry_time,
+            "exit_time": exit_time,
+            "duration": exit_time - entry_time,
+            "reason": self._trade_reason[i],
+        }
+
+    @property
+    def trade_history(self) -> List[dict]:
+        """Histórico como lista de dicts, materializado sob demanda."""
+        return [self._materialize_trade(i) for i in range(self._trade_count)]
+
+    # Até este tamanho de livro, a função especializada em linha reta
+    # ganha do custo de montar a varredura vetorizada.
+    _TICK_SPECIALIZE_MAX = 8
+
+    def _rebuild_tick_fn(self):
+        """Regenera a função de tick especializada no conjunto atual.
+
+        Avaliação parcial via exec: entrada, quantidade, stop, alvo e
+        direção são constantes enquanto a posição está aberta, então o
+        código gerado embute tudo como literais e só lê o preço — linha
+        reta, sem loop nem indexação de dict além do get por símbolo. O
+        conjunto só muda em open/close, então o custo de compilar é
+        pago raramente e amortizado sobre milhares de ticks.
+        """
+        n = len(self._pos_symbols)
+        if n == 0 or n > self._TICK_SPECIALIZE_MAX:
+            self._tick_fn = None
+            return
+
+        lines = [
+            "def _tick(pnl, price_data):",
+            "    total = 0.0",
+            "    n_upd = 0",
+            "    exits = []",
+        ]
+        for row in range(n):
+            s = repr(self._pos_symbols[row])
+            d = repr(float(self._dir_arr[row]))
+            entry = repr(float(self._entry_arr[row]))
+            qty = repr(float(self._qty_arr[row]))
+            sl = repr(float(self._sl_arr[row]))
+            tp = repr(float(self._tp_arr[row]))
+            lines += [
+                f"    c = price_data.get({s})",
+                "    if c is not None:",
+                f"        p = {d} * (c - {entry}) * {qty}",
+                f"        pnl[{row}] = p",
+                "        total += p",
+                "        n_upd += 1",
+                f"        if (c - {sl}) * {d} <= 0.0:",
+                f"            exits.append(({s}, c, 'Stop Loss'))",
+                f"        elif (c - {tp}) * {d} >= 0.0:",
+                f"            exits.append(({s}, c, 'Take Profit'))",
+            ]
+        lines.append("    return total, n_upd, exits")
+
+        namespace: dict = {}
+        exec(compile("\n".join(lines), "<tick>", "exec"), namespace)
+        self._tick_fn = namespace["_tick"]
+
+    def update_positions(self, price_data: Dict[str, float]):
+        """Atualiza PnL de todas as posições e aplica stops/alvos.
+
+        Livros pequenos usam a função especializada gerada em
+        _rebuild_tick_fn; acima do corte a varredura roda no kernel
+        _sweep direto sobre as fatias SoA persistentes (uma passada
+        nativa, sem montar arrays por tick). O Python só volta a cena
+        para as posições marcadas para saída.
+        """
+        n = len(self._pos_symbols)
+        if n == 0:
+            return
+
+        if self._tick_fn is not None:
+            total, n_upd, exits = self._tick_fn(self._pnl_arr, price_data)
+            if n_upd == 0:
+                return
+            if n_upd == n:
+                self._unrealized_sum = total
+            else:
+                # Linhas sem preço mantêm o PnL anterior no array.
+                self._unrealized_sum = float(self._pnl_arr[:n].sum())
+            if exits:
+                now = datetime.now()
+                for symbol, price, reason in exits:
+                    self.close_position(symbol, price, reason, _now=now)
+            return
+
+        prices = np.fromiter(
+            (price_data.get(s, np.nan) for s in self._pos_symbols),
+            dtype=np.float64, count=n,
+        )
+        valid = ~np.isnan(prices)
+        if not valid.any():
+            return
+
+        entry = self._entry_arr[:n]
+        qty = self._qty_arr[:n]
+        sl = self._sl_arr[:n]
+        tp = self._tp_arr[:n]
+
+        if valid.all():
+            exit_flags = np.zeros(n, dtype=np.int8)
+            # O kernel escreve o PnL direto na fatia persistente.
+            _sweep(prices, entry, qty, sl, tp, self._islong_arr[:n],
+                   self._pnl_arr[:n], exit_flags)
+        else:
+            # Tick parcial: máscaras vetorizadas com distância com sinal.
+            dirs = self._dir_arr[:n]
+            np.copyto(
+                self._pnl_arr[:n], dirs * (prices - entry) * qty,
+                where=valid,
+            )
+            sl_hit = valid & ((prices - sl) * dirs <= 0)
+            tp_hit = valid & ~sl_hit & ((prices - tp) * dirs >= 0)
+            exit_flags = np.where(sl_hit, 1, 0).astype(np.int8)
+            exit_flags[tp_hit] = 2
+
+        self._unrealized_sum = float(self._pnl_arr[:n].sum())
+
+        if exit_flags.any():
+            # Captura (símbolo, preço, motivo) antes de fechar: o
+            # swap-pop de close_position realoca linhas.
+            exits = [
+                (self._pos_symbols[i], float(prices[i]),
+                 "Stop Loss" if exit_flags[i] == 1 else "Take Profit")
+                for i in np.nonzero(exit_flags)[0]
+            ]
+            # Um único datetime.now() serve todos os fechamentos do tick.
+            now = datetime.now()
+            for symbol, price, reason in exits:
+                self.close_position(symbol, price, reason, _now=now)
+
+    def _check_exit_conditions(self, symbol: str, position: Position,
+                               price: float):
+        # Distância com sinal: o mesmo teste cobre LONG e SHORT, igual
+        # às máscaras vetorizadas de update_positions.
+        if (price - position.stop_loss) * position.direction <= 0:
+            self.close_position(symbol, price, "Stop Loss")
+        elif (price - position.take_profit) * position.direction >= 0:
+            self.close_position(symbol, price, "Take Profit")
+
+    # ------------------------------------------------------------------
+    # Valor e alocação
+    # ------------------------------------------------------------------
+
+    def get_total_portfolio_value(self) -> float:
+        """Caixa + custo das posições + PnL não realizado (somas O(1))."""
+        return (
+            self.available_cash + self._cost_basis_sum + self._unrealized_sum
+        )
+
+    def get_portfolio_allocation(self) -> Dict[str, float]:
+        """Fração do portfólio alocada em cada símbolo (e em caixa)."""
+        total_value = self.get_total_portfolio_value()
+        if total_value <= 0:
+            return {}
+
+        n = len(self._pos_symbols)
+        values = (
+            self._entry_arr[:n] * self._qty_arr[:n] + self._pnl_arr[:n]
+        )
+        allocation = dict(
+            zip(self._pos_symbols, (values / total_value).tolist())
+        )
+        allocation["CASH"] = self.available_cash / total_value
+        return allocation
+
+    # ------------------------------------------------------------------
+    # Métricas
+    # ------------------------------------------------------------------
+
+    def calculate_portfolio_metrics(self) -> PortfolioMetrics:
+        """Recalcula (sob demanda) as métricas agregadas do portfólio."""
+        total_value = self.get_total_portfolio_value()
+
+        if total_value != self._last_equity_value:
+            self.equity_curve.append((datetime.now(), total_value))
+            self._last_equity_value = total_value
+            self._equity_dirty = True
+
+        if self._trades_dirty:
+            self._cached_win_rate = self._calculate_win_rate()
+            self._cached_profit_factor = self._calculate_profit_factor()
+            self._trades_dirty = False
+        if self._equity_dirty:
+            self._cached_max_dd = self._calculate_max_drawdown()
+            self._equity_dirty = False
+
+        self.metrics = PortfolioMetrics(
+            total_value=total_value,
+            total_pnl=total_value - self.initial_capital,
+            win_rate=self._cached_win_rate,
+            sharpe_ratio=self._calculate_sharpe_ratio(),
+            max_drawdown=self._cached_max_dd,
+            profit_factor=self._cached_profit_factor,
+            num_trades=self._trade_count,
+        )
+        return self.metrics
+
+    def _calculate_win_rate(self) -> float:
+        # O(1): contador mantido em close_position.
+        if self._trade_count == 0:
+            return 0.0
+        return self._wins / self._trade_count * 100
+
+    def _calculate_profit_factor(self) -> float:
+        # O(1): somas brutas mantidas em close_position.
+        if self._gross_loss == 0:
+            return float("inf") if self._gross_profit > 0 else 0.0
+        return self._gross_profit / self._gross_loss
+
+    def record_daily_value(self, value: float):
+        """Registra o valor de fechamento do dia no ring buffer.
+
+        Atualiza os acumuladores de retorno na entrada (e desconta o
+        retorno mais antigo quando o buffer evita), mantendo o Sharpe
+        em O(1) por consulta.
+        """
+        if self._last_daily_value is not None and self._last_daily_value > 0:
+            ret = value / self._last_daily_value - 1.0
+            if self._ret_count == self._dv_capacity:
+                old = self._ret_buf[self._ret_head]
+                self._ret_sum -= old
+                self._ret_sq_sum -= old * old
+            else:
+                self._ret_count += 1
+            self._ret_buf[self._ret_head] = ret
+            self._ret_head = (self._ret_head + 1) % self._dv_capacity
+            self._ret_sum += ret
+            self._ret_sq_sum += ret * ret
+
+        self._dv_buf[self._dv_head] = value
+        self._dv_head = (self._dv_head + 1) % self._dv_capacity
+        if self._dv_count < self._dv_capacity:
+            self._dv_count += 1
+        self._last_daily_value = value
+
+    @property
+    def daily_values(self) -> List[float]:
+        """Valores diários em ordem cronológica."""
+        n = self._dv_count
+        if n < self._dv_capacity:
+            return self._dv_buf[:n].tolist()
+        idx = (self._dv_head + np.arange(n)) % self._dv_capacity
+        return self._dv_buf[idx].tolist()
+
+    def _calculate_sharpe_ratio(self) -> float:
+        # O(1): média e variância derivadas dos acumuladores do ring.
+        n = self._ret_count
+        if n < 2:
+            return 0.0
+        mean = self._ret_sum / n
+        variance = (self._ret_sq_sum - n * mean * mean) / (n - 1)
+        if variance <= 0:
+            return 0.0
+        return float(mean / np.sqrt(variance))
+
+    def _calculate_max_drawdown(self) -> float:
+        n = len(self.equity_curve)
+        if n == 0:
+            return 0.0
+        values = np.fromiter(
+            (v for _, v in self.equity_curve), dtype=np.float64, count=n
+        )
+        peaks = np.maximum.accumulate(values)
+        drawdowns = np.where(peaks > 0, 1.0 - values / peaks, 0.0)
+        return float(drawdowns.max() * 100)
+
+    def get_position_summary(self) -> dict:
+        """Resumo das posições abertas para exibição."""
+        return {
+            "timestamp": datetime.now().isoformat(),
+            "total_value": self.get_total_portfolio_value(),
+            "available_cash": self.available_cash,
+            "num_positions": len(self._pos_symbols),
+            "positions": {
+                symbol: {
+                    "type": self._ptype_rows[row].value,
+                    "entry_price": float(self._entry_arr[row]),
+                    "quantity": float(self._qty_arr[row]),
+                    "unrealized_pnl": float(self._pnl_arr[row]),
+                }
+                for symbol, row in self._row_of.items()
+            },
+        }
+
+    # ------------------------------------------------------------------
+    # Persistência
+    # ------------------------------------------------------------------
+
+    def save_state(self, path: str = "portfolio_state.json"):
+        """Salva o estado do portfólio em JSON (orjson, sem indentação).
+
+        orjson serializa datetimes nativamente em C; só timedeltas do
+        histórico passam pelo fallback str.
+        """
+        state = {
+            "initial_capital": self.initial_capital,
+            "available_cash": self.available_cash,
+            "positions": {
+                symbol: {
+                    "type": self._ptype_rows[row].value,
+                    "entry_price": float(self._entry_arr[row]),
+                    "quantity": float(self._qty_arr[row]),
+                    "entry_time": self._entry_time_rows[row],
+                    "stop_loss": float(self._sl_arr[row]),
+                    "take_profit": float(self._tp_arr[row]),
+                }
+                for symbol, row in self._row_of.items()
+            },
+            "trade_history": [
+                self._materialize_trade(i)
+                for i in range(max(0, self._trade_count - 100),
+                               self._trade_count)
+            ],
+        }
+        with open(path, "wb") as f:
+            f.write(
+                orjson.dumps(
+                    state,
+                    option=orjson.OPT_SERIALIZE_NUMPY,
+                    default=str,
+                )
+            )
+
+    def load_state(self, path: str = "portfolio_state.json") -> bool:
+        """Restaura o estado salvo, se existir."""
+        if not os.path.exists(path):
+            return False
+        with open(path, "rb") as f:
+            state = orjson.loads(f.read())
+
+        self.initial_capital = state.get(
+            "initial_capital", self.initial_capital
+        )
+        self.available_cash = state.get(
+            "available_cash", self.available_cash
+        )
+        for symbol, data in state.get("positions", {}).items():
+            self._insert_position(
+                symbol,
+                PositionType(data["type"]),
+                data["entry_price"],
+                data["quantity"],
+                datetime.fromisoformat(data["entry_time"]),
+                data["stop_loss"],
+                data["take_profit"],
+            )
+        n = len(self._pos_symbols)
+        self._cost_basis_sum = float(
+            (self._entry_arr[:n] * self._qty_arr[:n]).sum()
+        )
+        self._unrealized_sum = float(self._pnl_arr[:n].sum())
+        self._rebuild_tick_fn()
+        return True
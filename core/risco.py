@@ -0,0 +1,58 @@
+"""
+Gestão de risco: dimensionamento de posições.
+
+Tamanho de posição por risco fixo por trade (fração do capital em
+jogo entre a entrada e o stop), com teto de alocação por posição.
+"""
+
+from typing import Optional
+
+import numpy as np
+
+
+def calcular_tamanho_posicao(capital: float, preco_entrada: float,
+                             stop_loss: Optional[float] = None,
+                             risco_por_trade: float = 0.02) -> float:
+    """Valor (em moeda de cotação) a alocar numa entrada.
+
+    Arrisca ``risco_por_trade`` do capital entre a entrada e o stop;
+    sem stop definido, aloca 80% do capital como fallback conservador.
+    O valor final é limitado a 90% do capital.
+    """
+    if capital <= 0 or preco_entrada <= 0:
+        return 0.0
+    if stop_loss is None or stop_loss <= 0:
+        return capital * 0.8
+
+    risco_por_unidade = abs(preco_entrada - stop_loss)
+    if risco_por_unidade <= 0:
+        return capital * 0.8
+
+    quantidade = (capital * risco_por_trade) / risco_por_unidade
+    return min(quantidade * preco_entrada, capital * 0.9)
+
+
+def calcular_tamanho_posicao_vec(capital: float, entradas: np.ndarray,
+                                 stops: np.ndarray,
+                                 risco_por_trade: float = 0.02) -> np.ndarray:
+    """Versão vetorizada: dimensiona um lote de candidatos de uma vez.
+
+    Mesmas regras da versão escalar, aplicadas elemento a elemento com
+    NumPy — a camada de sinais avalia centenas de candidatos por barra
+    sem loop Python. Stops NaN ou inválidos caem no fallback de 80%.
+    """
+    entradas = np.asarray(entradas, dtype=np.float64)
+    stops = np.asarray(stops, dtype=np.float64)
+
+    if capital <= 0:
+        return np.zeros_like(entradas)
+
+    risco_por_unidade = np.abs(entradas - stops)
+    quantidade = (capital * risco_por_trade) / np.maximum(
+        risco_por_unidade, 1e-12
+    )
+    valores = np.minimum(quantidade * entradas, capital * 0.9)
+
+    sem_stop = np.isnan(stops) | (stops <= 0) | (risco_por_unidade <= 0)
+    valores = np.where(sem_stop, capital * 0.8, valores)
+    return np.where(entradas > 0, valores, 0.0)
@@ -0,0 +1,550 @@
+"""
+Gestão de risco avançada.
+
+Acompanha retornos diários, trades e curva de capital para derivar
+métricas de risco (Sharpe, Sortino, drawdown máximo, profit factor) e
+administra trailing stops por símbolo.
+"""
+
+import logging
+import math
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ._njit import HAS_NUMBA
+from ._portfolio_kernels import (
+    _fixed_risk_size,
+    _kelly_size,
+    _max_drawdown,
+    _update_trailing_stops,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class TrailingStopTable:
+    """Trailing stops em SoA: colunas NumPy paralelas por símbolo.
+
+    Em vez de um dict de dicts com seis campos Python por símbolo, as
+    colunas contíguas permitem atualizar todos os stops de um tick com
+    comparações vetorizadas (uma passada SIMD em vez de N lookups).
+    """
+
+    # float32: 7 dígitos de precisão bastam para razões de preço, a
+    # banda de memória cai pela metade e o kernel dobra as lanes SIMD.
+    def __init__(self, capacity: int = 64):
+        self._capacity = capacity
+        self.symbols: List[str] = []
+        self._row_of: Dict[str, int] = {}
+        self.highest_price = np.empty(capacity, dtype=np.float32)
+        self.lowest_price = np.empty(capacity, dtype=np.float32)
+        self.stop_price = np.full(capacity, np.nan, dtype=np.float32)
+        self.entry_price = np.empty(capacity, dtype=np.float32)
+        self.activated = np.zeros(capacity, dtype=np.uint8)
+        self.is_long = np.zeros(capacity, dtype=np.uint8)
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._row_of
+
+    def _grow(self):
+        new_cap = self._capacity * 2
+        for name in ("highest_price", "lowest_price", "stop_price",
+                     "entry_price", "activated", "is_long"):
+            old = getattr(self, name)
+            new = np.empty(new_cap, dtype=old.dtype)
+            new[:self._capacity] = old
+            setattr(self, name, new)
+        self._capacity = new_cap
+
+    def ensure(self, symbol: str, price: float, entry_price: float,
+               is_long: bool) -> int:
+        """Devolve a linha do símbolo, criando-a se necessário."""
+        row = self._row_of.get(symbol)
+        if row is not None:
+            return row
+        row = len(self.symbols)
+        if row == self._capacity:
+            self._grow()
+        self.symbols.append(symbol)
+        self._row_of[symbol] = row
+        self.highest_price[row] = price
+        self.lowest_price[row] = price
+        self.stop_price[row] = np.nan
+        self.entry_price[row] = entry_price
+        self.activated[row] = 0
+        self.is_long[row] = 1 if is_long else 0
+        return row
+
+    def remove(self, symbol: str):
+        row = self._row_of.pop(symbol, None)
+        if row is None:
+            return
+        last = len(self.symbols) - 1
+        if row != last:
+            moved = self.symbols[last]
+            self.symbols[row] = moved
+            self._row_of[moved] = row
+            for name in ("highest_price", "lowest_price", "stop_price",
+                         "entry_price", "activated", "is_long"):
+                arr = getattr(self, name)
+                arr[row] = arr[last]
+        self.symbols.pop()
+
+    def update_batch(self, prices: np.ndarray, activation: float,
+                     distance: float):
+        """Avança todos os trailing stops sem nenhum branch Python.
+
+        ``prices`` alinhado às linhas; NaN pula o símbolo no tick. Tudo
+        é expresso como máscaras booleanas + np.where — compare/blend
+        SIMD em linha reta, sem if por símbolo.
+        """
+        n = len(self.symbols)
+        if n == 0:
+            return
+
+        if HAS_NUMBA:
+            # Linhas independentes: o kernel paralelo varre os símbolos
+            # com prange, sem objetos Python no laço.
+            _update_trailing_stops(
+                prices, self.highest_price[:n], self.lowest_price[:n],
+                self.stop_price[:n], self.entry_price[:n],
+                self.activated[:n], self.is_long[:n],
+                activation, distance,
+            )
+            return
+
+        valid = ~np.isnan(prices)
+        ml = (self.is_long[:n] == 1) & valid
+        ms = ~ml & valid
+
+        hp = self.highest_price[:n]
+        lp = self.lowest_price[:n]
+        ep = self.entry_price[:n]
+        sp = self.stop_price[:n]
+
+        hp[:] = np.where((prices > hp) & ml, prices, hp)
+        lp[:] = np.where((prices < lp) & ms, prices, lp)
+
+        # Lucro com sinal pela direção; candidato sempre calculado — a
+        # aceitação é só um blend no final.
+        direction = np.where(ml, 1.0, -1.0)
+        profit = direction * (prices - ep) / ep
+        self.activated[:n] |= ((profit >= activation) & valid).astype(
+            np.uint8
+        )
+
+        candidate = prices * (1.0 - direction * distance)
+        improve = (
+            np.isnan(sp)
+            | ((candidate > sp) & ml)
+            | ((candidate < sp) & ms)
+        )
+        accept = (self.activated[:n] == 1) & valid & improve
+        sp[:] = np.where(accept, candidate, sp)
+
+
+class RiskManager:
+    """Métricas de risco e trailing stops do bot."""
+
+    def __init__(self, max_risk_per_trade: float = 0.02,
+                 max_daily_loss: float = 0.05,
+                 bars_per_year: int = 252):
+        self.max_risk_per_trade = max_risk_per_trade
+        self.max_daily_loss = max_daily_loss
+        self.max_position_size = 0.20
+        # Para barras intradiárias, passe bars_per_year condizente
+        # (ex.: 24*365 para candles de 1h em cripto).
+        self.bars_per_year = bars_per_year
+        self._ann_factor = math.sqrt(bars_per_year)
+
+        # deque com maxlen: push O(1) com eviction automática, sem o
+        # rebuild por fatia quando o histórico passa do teto.
+        self.trade_history: deque = deque(maxlen=1000)
+        self.equity_curve: List[float] = []
+        self._n_trades = 0  # total desde o início (o deque só guarda 1000)
+
+        # Retornos diários num ring float32 de tamanho fixo: inserção
+        # O(1) sem realocação; quando o ring dá a volta, o retorno
+        # evitado é descontado dos acumuladores (que seguem em float64
+        # para não acumular erro).
+        self._returns_capacity = 1024
+        self._returns_n = 0
+        self._returns_head = 0
+        self._returns_buf = np.empty(self._returns_capacity, dtype=np.float32)
+
+        # Acumuladores incrementais: cada add_trade/update_equity custa
+        # O(1) e cada métrica vira uma expressão sobre os acumuladores,
+        # sem varrer trade_history ou equity_curve de novo.
+        self._sum_r = 0.0
+        self._sum_r2 = 0.0
+        self._sum_neg_r2 = 0.0
+        self._neg_count = 0
+        self._wins = 0
+        self._losses = 0
+        self._consecutive_losses = 0
+        self._gross_profit = 0.0
+        self._gross_loss = 0.0
+        self._peak_equity = 0.0
+        self._max_dd = 0.0
+
+        # Trailing stops por símbolo, em colunas SoA.
+        self.trailing_stops = TrailingStopTable()
+        self.trailing_stop_activation = 0.015
+        self.trailing_stop_distance = 0.008
+
+    # ------------------------------------------------------------------
+    # Registro
+    # ------------------------------------------------------------------
+
+    def _append_return(self, retorno: float):
+        if self._returns_n == self._returns_capacity:
+            # Ring cheio: desconta o retorno que sai dos acumuladores.
+            # float() antes da aritmética: o valor guardado em float32 é
+            # o mesmo que entrou nos acumuladores ao ser inserido.
+            old = float(self._returns_buf[self._returns_head])
+            self._sum_r -= old
+            self._sum_r2 -= old * old
+            if old < 0:
+                self._sum_neg_r2 -= old * old
+                self._neg_count -= 1
+        else:
+            self._returns_n += 1
+        self._returns_buf[self._returns_head] = retorno
+        self._returns_head = (self._returns_head + 1) % self._returns_capacity
+
+    @property
+    def daily_returns(self) -> List[float]:
+        """Retornos registrados, em ordem cronológica."""
+        n = self._returns_n
+        if n < self._returns_capacity:
+            return self._returns_buf[:n].tolist()
+        idx = (self._returns_head + np.arange(n)) % self._returns_capacity
+        return self._returns_buf[idx].tolist()
+
+    def add_trade(self, symbol: str, pnl: float,
+                  retorno: Optional[float] = None):
+        """Registra um trade fechado e seu retorno."""
+        self.trade_history.append({
+            "symbol": symbol,
+            "pnl": pnl,
+            "retorno": retorno,
+            "timestamp": datetime.now(),
+        })
+        self._n_trades += 1
+        if retorno is not None:
+            # Arredonda para float32 antes de acumular: inserção e
+            # eviction do ring trabalham com o mesmo valor.
+            retorno = float(np.float32(retorno))
+            self._append_return(retorno)
+            self._sum_r += retorno
+            self._sum_r2 += retorno * retorno
+            if retorno < 0:
+                self._sum_neg_r2 += retorno * retorno
+                self._neg_count += 1
+
+        if pnl > 0:
+            self._wins += 1
+            self._gross_profit += pnl
+        elif pnl < 0:
+            self._losses += 1
+            self._gross_loss -= pnl
+        # Sequência corrente de perdas mantida aqui: a checagem de
+        # circuit breaker vira uma comparação O(1), sem fatiar o
+        # histórico a cada tick.
+        self._consecutive_losses = self._consecutive_losses + 1 \
+            if pnl < 0 else 0
+
+    def update_equity(self, value: float):
+        self.equity_curve.append(value)
+        # Pico e drawdown correntes mantidos na inserção.
+        if value > self._peak_equity:
+            self._peak_equity = value
+        elif self._peak_equity > 0:
+            dd = 1.0 - value / self._peak_equity
+            if dd > self._max_dd:
+                self._max_dd = dd
+
+    # ------------------------------------------------------------------
+    # Métricas
+    # ------------------------------------------------------------------
+
+    def calculate_sharpe_ratio(self, risk_free_rate: float = 0.02) -> float:
+        """Sharpe anualizado sobre os retornos por barra.
+
+        Razão por barra vezes sqrt(bars_per_year), como na definição
+        padrão — comparável com relatórios externos.
+        """
+        n = self._returns_n
+        if n < 2:
+            return 0.0
+        # O(1): deslocar pela taxa livre de risco não muda a variância.
+        mean_excess = self._sum_r / n - risk_free_rate / self.bars_per_year
+        variance = (self._sum_r2 - self._sum_r * self._sum_r / n) / (n - 1)
+        if variance <= 0:
+            return 0.0
+        return float(mean_excess / np.sqrt(variance)) * self._ann_factor
+
+    def calculate_sortino_ratio(self, risk_free_rate: float = 0.02) -> float:
+        """Sortino anualizado: só o desvio dos negativos penaliza."""
+        n = self._returns_n
+        if n < 2:
+            return 0.0
+        mean_excess = self._sum_r / n - risk_free_rate / self.bars_per_year
+        if self._neg_count == 0:
+            return float("inf") if mean_excess > 0 else 0.0
+        # Máscara de negativos sobre o retorno bruto: a taxa diária
+        # (~1e-4) não move retornos de lado na prática.
+        downside = np.sqrt(self._sum_neg_r2 / self._neg_count)
+        if downside == 0:
+            return 0.0
+        return float(mean_excess / downside) * self._ann_factor
+
+    def calculate_max_drawdown(self) -> float:
+        """Drawdown máximo (fração): valor incremental de update_equity."""
+        return self._max_dd
+
+    def _recompute_max_drawdown(self) -> float:
+        """Varredura completa da curva (usada ao restaurar estado).
+
+        O laço pico/drawdown roda no kernel _max_drawdown compilado —
+        uma conversão para array e uma chamada nativa, sem dispatch
+        Python por ponto da curva.
+        """
+        if not self.equity_curve:
+            return 0.0
+        equity = np.asarray(self.equity_curve, dtype=np.float64)
+        self._peak_equity = float(equity.max())
+        self._max_dd = float(_max_drawdown(equity))
+        return self._max_dd
+
+    def max_drawdown_window(self) -> Tuple[float, int, int]:
+        """Drawdown máximo com os índices de pico e vale.
+
+        Formulação prefix-max: duas passadas de ufunc
+        (np.maximum.accumulate + um argmax) inteiramente em C, para
+        relatórios que precisam localizar a janela do drawdown.
+        """
+        if not self.equity_curve:
+            return 0.0, 0, 0
+        equity = np.asarray(self.equity_curve, dtype=np.float64)
+        peaks = np.maximum.accumulate(equity)
+        drawdowns = np.where(peaks > 0, (peaks - equity) / peaks, 0.0)
+        end = int(drawdowns.argmax())
+        start = int(equity[:end + 1].argmax())
+        return float(drawdowns[end]), start, end
+
+    def _calculate_win_rate(self) -> float:
+        # O(1): contadores mantidos em add_trade (totais desde o
+        # início; o deque guarda só os últimos 1000 para exibição).
+        if self._n_trades == 0:
+            return 0.0
+        return self._wins / self._n_trades * 100
+
+    def _calculate_avg_win(self) -> float:
+        return self._gross_profit / self._wins if self._wins else 0.0
+
+    def _calculate_avg_loss(self) -> float:
+        return -self._gross_loss / self._losses if self._losses else 0.0
+
+    def _calculate_profit_factor(self) -> float:
+        if self._gross_loss == 0:
+            return float("inf") if self._gross_profit > 0 else 0.0
+        return self._gross_profit / self._gross_loss
+
+    def should_stop_trading(self, daily_loss_pct: float) -> bool:
+        """Circuit breaker do dia.
+
+        Para na perda diária máxima, ou em 3 perdas seguidas já com o
+        dia 2% no vermelho. Só comparações sobre contadores correntes.
+        """
+        if daily_loss_pct >= self.max_daily_loss:
+            return True
+        return self._consecutive_losses >= 3 and daily_loss_pct > 0.02
+
+    def get_risk_metrics(self) -> dict:
+        """Painel consolidado de métricas de risco.
+
+        Cada campo sai dos acumuladores mantidos em add_trade e
+        update_equity — nenhuma métrica volta a iterar trade_history,
+        então o custo do painel independe do número de trades.
+        """
+        return {
+            "num_trades": self._n_trades,
+            "win_rate": self._calculate_win_rate(),
+            "avg_win": self._calculate_avg_win(),
+            "avg_loss": self._calculate_avg_loss(),
+            "profit_factor": self._calculate_profit_factor(),
+            "sharpe_ratio": self.calculate_sharpe_ratio(),
+            "sortino_ratio": self.calculate_sortino_ratio(),
+            "max_drawdown": self.calculate_max_drawdown(),
+        }
+
+    # ------------------------------------------------------------------
+    # Dimensionamento
+    # ------------------------------------------------------------------
+
+    def calculate_kelly_position_size(self, capital: float) -> float:
+        """Tamanho de posição por meio-Kelly sobre o histórico corrente.
+
+        A aritmética roda no kernel compilado _kelly_size — locais em
+        double nativo, sem boxing nem lookups de atributo por chamada.
+        """
+        win_rate = self._wins / self._n_trades if self._n_trades else 0.0
+        return float(_kelly_size(
+            capital, win_rate,
+            self._calculate_avg_win(), -self._calculate_avg_loss(),
+            self.max_position_size,
+        ))
+
+    # LUT fracionária de meio-Kelly indexada por (win_rate, b) em grade
+    # regular — construída uma vez por processo, compartilhada entre
+    # instâncias; usada nos sweeps de parâmetros onde a mesma conta
+    # roda milhares de vezes com entradas parecidas.
+    _kelly_lut: Optional[np.ndarray] = None
+    _LUT_P0, _LUT_PSTEP, _LUT_NP = 0.01, 0.01, 99
+    _LUT_B0, _LUT_BSTEP, _LUT_NB = 0.1, 0.1, 50
+
+    @classmethod
+    def _build_kelly_lut(cls):
+        p = np.linspace(0.01, 0.99, cls._LUT_NP)
+        b = np.linspace(0.1, 5.0, cls._LUT_NB)
+        bb, pp = np.meshgrid(b, p)  # lut[i_p, i_b]
+        cls._kelly_lut = np.clip(
+            (bb * pp - (1.0 - pp)) / bb, 0.0, 0.25
+        ) * 0.5
+
+    def kelly_size_lut(self, capital: float, win_rate: float,
+                       b: float) -> float:
+        """Meio-Kelly por lookup + interpolação bilinear na LUT.
+
+        Para laços quentes de grid search: um fetch 2x2 na tabela em
+        cache em vez da fórmula completa. Fora da grade (entradas
+        degeneradas) cai no fallback de 2%, como o kernel escalar.
+        """
+        if (win_rate <= 0.0 or win_rate >= 1.0 or b <= 0.0):
+            return capital * 0.02
+        lut = RiskManager._kelly_lut
+        if lut is None:
+            self._build_kelly_lut()
+            lut = RiskManager._kelly_lut
+
+        fp = (win_rate - self._LUT_P0) / self._LUT_PSTEP
+        fb = (b - self._LUT_B0) / self._LUT_BSTEP
+        fp = min(max(fp, 0.0), self._LUT_NP - 1.000001)
+        fb = min(max(fb, 0.0), self._LUT_NB - 1.000001)
+        i, j = int(fp), int(fb)
+        tp, tb = fp - i, fb - j
+        frac = (
+            lut[i, j] * (1 - tp) * (1 - tb)
+            + lut[i + 1, j] * tp * (1 - tb)
+            + lut[i, j + 1] * (1 - tp) * tb
+            + lut[i + 1, j + 1] * tp * tb
+        )
+        return float(min(capital * frac,
+                         capital * self.max_position_size))
+
+    def kelly_sizes_batch(self, capital: float, win_rates: np.ndarray,
+                          avg_wins: np.ndarray,
+                          avg_losses: np.ndarray) -> np.ndarray:
+        """Meio-Kelly para um lote de candidatos numa expressão só.
+
+        Ranquear N símbolos chamava o cálculo escalar N vezes; aqui a
+        cadeia de ufuncs dimensiona o lote inteiro de uma vez. Linhas
+        degeneradas (win rate fora de (0,1), perda média nula) caem no
+        fallback de 2%.
+        """
+        win_rates = np.asarray(win_rates, dtype=np.float64)
+        avg_wins = np.asarray(avg_wins, dtype=np.float64)
+        avg_losses = np.asarray(avg_losses, dtype=np.float64)
+
+        valid = (
+            (win_rates > 0) & (win_rates < 1)
+            & (avg_wins > 0) & (avg_losses > 0)
+        )
+        b = np.where(valid, avg_wins / np.where(valid, avg_losses, 1.0), 1.0)
+        kelly = np.clip((b * win_rates - (1 - win_rates)) / b, 0.0, 0.25)
+        sizes = np.minimum(
+            capital * kelly * 0.5, capital * self.max_position_size
+        )
+        return np.where(valid, sizes, capital * 0.02)
+
+    def calculate_position_size_fixed_risk(self, capital: float,
+                                           entry_price: float,
+                                           stop_loss: float) -> float:
+        """Tamanho por risco fixo (max_risk_per_trade entre entrada e stop)."""
+        return float(_fixed_risk_size(
+            capital, entry_price, stop_loss,
+            self.max_risk_per_trade, self.max_position_size,
+        ))
+
+    # ------------------------------------------------------------------
+    # Trailing stops
+    # ------------------------------------------------------------------
+
+    def update_trailing_stop(self, symbol: str, price: float,
+                             entry_price: float,
+                             is_long: bool = True) -> Optional[float]:
+        """Atualiza (e devolve) o trailing stop do símbolo.
+
+        Wrapper escalar sobre a tabela SoA, para chamadores que ainda
+        operam símbolo a símbolo.
+        """
+        table = self.trailing_stops
+        row = table.ensure(symbol, price, entry_price, is_long)
+
+        if is_long:
+            if price > table.highest_price[row]:
+                table.highest_price[row] = price
+            profit_pct = (price - entry_price) / entry_price
+        else:
+            if price < table.lowest_price[row]:
+                table.lowest_price[row] = price
+            profit_pct = (entry_price - price) / entry_price
+
+        if profit_pct >= self.trailing_stop_activation:
+            table.activated[row] = 1
+        if table.activated[row]:
+            if is_long:
+                candidate = price * (1 - self.trailing_stop_distance)
+                if np.isnan(table.stop_price[row]) \
+                        or candidate > table.stop_price[row]:
+                    table.stop_price[row] = candidate
+            else:
+                candidate = price * (1 + self.trailing_stop_distance)
+                if np.isnan(table.stop_price[row]) \
+                        or candidate < table.stop_price[row]:
+                    table.stop_price[row] = candidate
+
+        stop = table.stop_price[row]
+        return None if np.isnan(stop) else float(stop)
+
+    def update_trailing_stop_batch(self, price_data: Dict[str, float]):
+        """Avança todos os trailing stops de um tick de uma vez."""
+        table = self.trailing_stops
+        n = len(table)
+        if n == 0:
+            return
+        prices = np.fromiter(
+            (price_data.get(s, np.nan) for s in table.symbols),
+            dtype=np.float32, count=n,
+        )
+        table.update_batch(
+            prices, self.trailing_stop_activation,
+            self.trailing_stop_distance,
+        )
+
+    def get_trailing_stop(self, symbol: str) -> Optional[float]:
+        row = self.trailing_stops._row_of.get(symbol)
+        if row is None:
+            return None
+        stop = self.trailing_stops.stop_price[row]
+        return None if np.isnan(stop) else float(stop)
+
+    def remove_trailing_stop(self, symbol: str):
+        self.trailing_stops.remove(symbol)
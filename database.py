@@ -0,0 +1,357 @@
+"""
+Persistência do bot em SQLite.
+
+Uma conexão única e duradoura, aberta no __init__ com WAL e pragmas
+ajustados — cada ponto de entrada deixa de pagar connect/fechar e o
+fsync por transação do journal clássico. Escritas protegidas por lock,
+já que a conexão é compartilhada entre threads.
+"""
+
+import atexit
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List
+
+import numpy as np
+import orjson
+
+logger = logging.getLogger(__name__)
+
+_PRAGMAS = """
+PRAGMA journal_mode=WAL;
+PRAGMA synchronous=NORMAL;
+PRAGMA temp_store=MEMORY;
+PRAGMA busy_timeout=5000;
+PRAGMA cache_size=-20000;
+"""
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS logs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT DEFAULT (datetime('now', 'localtime')),
+    level TEXT NOT NULL,
+    source TEXT NOT NULL,
+    message TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS trades (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT DEFAULT (datetime('now', 'localtime')),
+    symbol TEXT NOT NULL,
+    tipo TEXT NOT NULL,
+    preco REAL NOT NULL,
+    quantidade REAL NOT NULL,
+    pnl REAL DEFAULT 0,
+    motivo TEXT DEFAULT ''
+);
+CREATE TABLE IF NOT EXISTS config (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    updated_at TEXT NOT NULL DEFAULT (datetime('now', 'localtime'))
+);
+CREATE INDEX IF NOT EXISTS idx_trades_timestamp ON trades(timestamp);
+CREATE INDEX IF NOT EXISTS idx_logs_timestamp ON logs(timestamp);
+CREATE INDEX IF NOT EXISTS idx_trades_pnl ON trades(pnl);
+"""
+
+# Limites do lote de escrita: flush por tamanho ou por idade, o que
+# vier primeiro. O SQLite é limitado pelo fsync do COMMIT (~centenas
+# por segundo); agrupar linhas num BEGIN/COMMIT só corta esse custo em
+# ~2 ordens de grandeza no caminho de logging contínuo.
+_FLUSH_ROWS = 500
+_FLUSH_SECS = 1.0
+
+
+class DatabaseManager:
+    """Logs, trades e configuração do bot num arquivo SQLite."""
+
+    def __init__(self, db_file: str = "bot_trade.db"):
+        self.db_file = db_file
+        # isolation_level=None: autocommit — as transações explícitas
+        # ficam a cargo de quem agrupa escritas.
+        self.conn = sqlite3.connect(
+            db_file, check_same_thread=False, isolation_level=None
+        )
+        self.conn.executescript(_PRAGMAS)
+        self.conn.executescript(_SCHEMA)
+        # Réplica da config em memória (ATTACH :memory:): o caminho de
+        # leitura que escapar do cache de dict consulta RAM, sem andar
+        # pelo page cache/WAL do arquivo em disco.
+        self.conn.executescript(
+            "ATTACH DATABASE ':memory:' AS mem;"
+            "CREATE TABLE mem.config (key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL);"
+            "INSERT INTO mem.config SELECT key, value FROM config;"
+        )
+        self._lock = threading.Lock()
+        # Lotes em memória de logs/trades; materializados de uma vez
+        # dentro de uma única transação.
+        self._log_buf: List[tuple] = []
+        self._trade_buf: List[tuple] = []
+        self._last_flush = time.monotonic()
+        # Cache de config em memória: os valores mudam raramente, então
+        # leituras em regime viram um lookup de dict sem SQL/json.loads.
+        # O sentinela distingue "não cacheado" de "valor None".
+        self._cfg_cache: Dict[str, Any] = {}
+        self._cfg_sentinel = object()
+        # Espelho colunar dos PnLs em memória: as estatísticas viram
+        # reduções SIMD sobre memória contígua em vez de um scan pelo
+        # VDBE do SQLite. float32 — 7 dígitos bastam para PnL e o dobro
+        # de lanes por vadd; o schema no disco segue em REAL (float64).
+        # Capacidade dobra quando enche, como os buffers do portfólio.
+        self._pnl_capacity = 256
+        self._pnl_n = 0
+        self._pnl_arr = np.empty(self._pnl_capacity, dtype=np.float32)
+        self._carregar_pnls()
+
+        # Thread escritora dedicada: produtores só enfileiram; quem
+        # paga executemany/COMMIT (e o fsync) é sempre esta thread, de
+        # modo que o laço de decisão nunca bloqueia em disco.
+        self._q: queue.Queue = queue.Queue(maxsize=10000)
+        self._dropped_logs = 0
+        self._writer_stop = threading.Event()
+        self._writer = threading.Thread(
+            target=self._writer_loop, daemon=True,
+            name="db-writer",
+        )
+        self._writer.start()
+        atexit.register(self.close)
+
+    # ------------------------------------------------------------------
+    # Escrita
+    # ------------------------------------------------------------------
+
+    def log(self, level: str, source: str, message: str):
+        # Timestamp capturado no enqueue: a linha pode só tocar o
+        # disco no próximo flush da escritora.
+        row = (
+            datetime.now().isoformat(sep=" ", timespec="seconds"),
+            level, source, message,
+        )
+        try:
+            self._q.put_nowait(("log", row))
+            return
+        except queue.Full:
+            pass
+        # Fila cheia: abre espaço descartando o item mais antigo se for
+        # log; um trade antigo vai direto para o buffer (nunca se perde).
+        try:
+            tipo_velho, row_velho = self._q.get_nowait()
+        except queue.Empty:
+            tipo_velho = None
+        if tipo_velho == "log":
+            self._dropped_logs += 1
+        elif tipo_velho == "trade":
+            with self._lock:
+                self._trade_buf.append(row_velho)
+        try:
+            self._q.put_nowait(("log", row))
+        except queue.Full:
+            self._dropped_logs += 1
+
+    def add_trade(self, symbol: str, tipo: str, preco: float,
+                  quantidade: float, pnl: float = 0.0, motivo: str = ""):
+        row = (
+            datetime.now().isoformat(sep=" ", timespec="seconds"),
+            symbol, tipo, preco, quantidade, pnl, motivo,
+        )
+        with self._lock:
+            self._append_pnl(pnl)
+        # put bloqueante: trade nunca é descartado, mesmo com fila cheia.
+        self._q.put(("trade", row))
+
+    def _writer_loop(self):
+        while not self._writer_stop.is_set():
+            try:
+                tipo, row = self._q.get(timeout=_FLUSH_SECS)
+            except queue.Empty:
+                with self._lock:
+                    self._flush_locked()
+                continue
+            with self._lock:
+                if tipo == "log":
+                    self._log_buf.append(row)
+                else:
+                    self._trade_buf.append(row)
+                self._flush_if_due_locked()
+
+    def _drain_queue(self):
+        while True:
+            try:
+                tipo, row = self._q.get_nowait()
+            except queue.Empty:
+                return
+            with self._lock:
+                if tipo == "log":
+                    self._log_buf.append(row)
+                else:
+                    self._trade_buf.append(row)
+
+    def _carregar_pnls(self):
+        """Recarrega o espelho de PnLs do banco no startup."""
+        pnls = np.fromiter(
+            (row[0] for row in self.conn.execute(
+                "SELECT pnl FROM trades ORDER BY id")),
+            dtype=np.float32,
+        )
+        n = len(pnls)
+        while n > self._pnl_capacity:
+            self._pnl_capacity *= 2
+        self._pnl_arr = np.empty(self._pnl_capacity, dtype=np.float32)
+        self._pnl_arr[:n] = pnls
+        self._pnl_n = n
+
+    def _append_pnl(self, pnl: float):
+        if self._pnl_n == self._pnl_capacity:
+            self._pnl_capacity *= 2
+            novo = np.empty(self._pnl_capacity, dtype=np.float32)
+            novo[:self._pnl_n] = self._pnl_arr[:self._pnl_n]
+            self._pnl_arr = novo
+        self._pnl_arr[self._pnl_n] = pnl
+        self._pnl_n += 1
+
+    def _flush_if_due_locked(self):
+        if (len(self._log_buf) >= _FLUSH_ROWS
+                or len(self._trade_buf) >= _FLUSH_ROWS
+                or time.monotonic() - self._last_flush >= _FLUSH_SECS):
+            self._flush_locked()
+
+    def _flush_locked(self):
+        self._last_flush = time.monotonic()
+        if not self._log_buf and not self._trade_buf:
+            return
+        # Um BEGIN/COMMIT para o lote inteiro: um fsync, não um por linha.
+        self.conn.execute("BEGIN")
+        try:
+            if self._log_buf:
+                self.conn.executemany(
+                    "INSERT INTO logs(timestamp, level, source, message)"
+                    " VALUES(?,?,?,?)",
+                    self._log_buf,
+                )
+                self._log_buf.clear()
+            if self._trade_buf:
+                self.conn.executemany(
+                    "INSERT INTO trades(timestamp, symbol, tipo, preco,"
+                    " quantidade, pnl, motivo) VALUES(?,?,?,?,?,?,?)",
+                    self._trade_buf,
+                )
+                self._trade_buf.clear()
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    def flush(self):
+        """Drena a fila e materializa os lotes pendentes."""
+        self._drain_queue()
+        with self._lock:
+            self._flush_locked()
+
+    # Statement fixo: uma string compartilhada deixa o cache interno de
+    # statements do sqlite3 reutilizar o plano compilado entre chamadas.
+    # updated_at fica por conta do DEFAULT da coluna — o OR REPLACE
+    # reinsere a linha, então o default é reavaliado a cada escrita.
+    _SET_CFG_SQL = ("INSERT OR REPLACE INTO config(key, value)"
+                    " VALUES(?,?)")
+
+    def set_config(self, key: str, value: Any):
+        self.set_configs({key: value})
+
+    def set_configs(self, valores: Dict[str, Any]):
+        """Grava várias chaves de config numa transação só.
+
+        Cargas em lote (startup, sweeps de parâmetros) pagam um único
+        COMMIT em vez de um por chave.
+        """
+        rows = [(k, orjson.dumps(v).decode())
+                for k, v in valores.items()]
+        with self._lock:
+            self.conn.execute("BEGIN")
+            try:
+                self.conn.executemany(self._SET_CFG_SQL, rows)
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO mem.config(key, value)"
+                    " VALUES(?,?)", rows,
+                )
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+            # Write-through: o cache só é atualizado com a escrita
+            # confirmada no banco.
+            self._cfg_cache.update(valores)
+
+    # ------------------------------------------------------------------
+    # Leitura
+    # ------------------------------------------------------------------
+
+    def get_config(self, key: str, default: Any = None) -> Any:
+        valor = self._cfg_cache.get(key, self._cfg_sentinel)
+        if valor is not self._cfg_sentinel:
+            return valor
+        row = self.conn.execute(
+            "SELECT value FROM mem.config WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return default
+        try:
+            valor = orjson.loads(row[0])
+        except orjson.JSONDecodeError:
+            # Valor legado gravado cru: devolve a string como está.
+            valor = row[0]
+        self._cfg_cache[key] = valor
+        return valor
+
+    def get_recent_trades(self, limit: int = 50) -> List[Dict]:
+        self.flush()  # as leituras enxergam o lote ainda em memória
+        rows = self.conn.execute(
+            "SELECT timestamp, symbol, tipo, preco, quantidade, pnl,"
+            " motivo FROM trades ORDER BY id DESC LIMIT ?",
+            (limit,),
+        ).fetchall()
+        cols = ("timestamp", "symbol", "tipo", "preco", "quantidade",
+                "pnl", "motivo")
+        return [dict(zip(cols, row)) for row in rows]
+
+    def get_performance_stats(self) -> Dict[str, float]:
+        """Estatísticas agregadas sobre o espelho colunar.
+
+        Reduções vetorizadas sobre o array de PnLs em memória — nada de
+        table scan no SQLite e nenhuma dependência do flush do lote,
+        já que o espelho é alimentado no próprio add_trade.
+        """
+        pnls = self._pnl_arr[:self._pnl_n]
+        pnls = pnls[pnls != 0]  # só trades fechados com resultado
+        total = len(pnls)
+        if not total:
+            return {"num_trades": 0, "pnl_total": 0.0,
+                    "win_rate": 0.0, "profit_factor": 0.0}
+        # Coluna em float32, acumulação em float64: largura de banda da
+        # leitura cai pela metade sem acumular erro na soma.
+        wins_mask = pnls > 0
+        gross_profit = float(pnls[wins_mask].sum(dtype=np.float64))
+        gross_loss = float(-pnls[~wins_mask].sum(dtype=np.float64))
+        return {
+            "num_trades": total,
+            "pnl_total": float(pnls.sum(dtype=np.float64)),
+            "win_rate": float(wins_mask.sum()) / total * 100,
+            "profit_factor": (
+                gross_profit / gross_loss if gross_loss else 0.0
+            ),
+        }
+
+    def close(self):
+        if self.conn is not None:
+            self._writer_stop.set()
+            if self._writer.is_alive():
+                self._writer.join(timeout=2 * _FLUSH_SECS)
+            try:
+                self.flush()
+                self.conn.close()
+            except sqlite3.ProgrammingError:
+                pass  # já fechada
+            self.conn = None
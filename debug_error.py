@@ -0,0 +1,65 @@
+"""
+Diagnóstico rápido da API da exchange.
+
+Dispara todas as chamadas (preço, ticker 24h e klines de cada par) num
+único ``asyncio.gather`` — N*3 requisições em paralelo limitadas por um
+RTT, em vez de N*3 idas e voltas sequenciais.
+"""
+
+import asyncio
+import time
+from typing import List, Optional
+
+PARES_PADRAO = ["BTCUSDT", "ETHUSDT", "BNBUSDT", "SOLUSDT"]
+
+
+async def test_api(api, pares: Optional[List[str]] = None) -> int:
+    """Testa a conectividade da API para cada par.
+
+    ``api`` é o cliente da exchange (precisa expor ``get_price``,
+    ``get_24h_ticker`` e ``get_klines`` como corrotinas). Devolve o
+    número de pares com as três chamadas OK.
+    """
+    pares = list(pares or PARES_PADRAO)
+    n = len(pares)
+
+    inicio = time.perf_counter()
+    # Um gather só para todos os (método, par): as exceções voltam como
+    # resultado em vez de derrubar o lote.
+    results = await asyncio.gather(
+        *(api.get_price(p) for p in pares),
+        *(api.get_24h_ticker(p) for p in pares),
+        *(api.get_klines(p, "1d", 100) for p in pares),
+        return_exceptions=True,
+    )
+    duracao = time.perf_counter() - inicio
+
+    ok = 0
+    for i, par in enumerate(pares):
+        preco = results[i]
+        ticker = results[n + i]
+        klines = results[2 * n + i]
+
+        falhas = [
+            nome for nome, r in (
+                ("preço", preco), ("ticker", ticker), ("klines", klines),
+            )
+            if isinstance(r, Exception)
+        ]
+        if falhas:
+            print(f"❌ {par}: falha em {', '.join(falhas)}")
+            for r in (preco, ticker, klines):
+                if isinstance(r, Exception):
+                    print(f"   {type(r).__name__}: {r}")
+        else:
+            print(f"✅ {par}: preço={preco} | {len(klines)} klines")
+            ok += 1
+
+    print(f"\n{ok}/{n} pares OK em {duracao:.2f}s")
+    return ok
+
+
+if __name__ == "__main__":
+    print("Uso: importe test_api e passe o cliente da exchange:")
+    print("  from debug_error import test_api")
+    print("  asyncio.run(test_api(api))")
@@ -0,0 +1,357 @@
+"""
+Preditor de Machine Learning para sinais de trading.
+
+Treina um modelo por símbolo a partir do histórico de preços e prevê a
+direção do próximo movimento (alta, baixa ou neutro).
+"""
+
+import hashlib
+import logging
+import os
+from collections import deque
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import HistGradientBoostingClassifier
+from sklearn.model_selection import TimeSeriesSplit
+from sklearn.preprocessing import StandardScaler
+
+logger = logging.getLogger(__name__)
+
+
+class IncrementalFeatureState:
+    """Estado incremental das features de um símbolo.
+
+    Mantém uma janela limitada de preços/volumes e as EMAs como
+    recorrências O(1), de modo que cada tick novo gere a linha de
+    features com custo fixo — em vez de reconstruir o DataFrame sobre o
+    histórico completo só para usar a última linha. A ordem da linha
+    devolvida espelha exatamente as colunas de _create_features (sem a
+    coluna price).
+    """
+
+    # Cobre a maior janela de média móvel (50) e o período de RSI (21+1).
+    WINDOW = 128
+
+    def __init__(self):
+        self.prices = deque(maxlen=self.WINDOW)
+        self.volumes = deque(maxlen=self.WINDOW)
+        self.ema = {12: None, 26: None}
+        self.last_row = None
+
+    def update(self, price: float, volume: float = 0.0):
+        """Incorpora um novo preço/volume e devolve a linha de features.
+
+        Retorna None enquanto o histórico for curto demais para as
+        janelas maiores.
+        """
+        self.prices.append(float(price))
+        self.volumes.append(float(volume))
+
+        for periodo in (12, 26):
+            k = 2 / (periodo + 1)
+            anterior = self.ema[periodo]
+            if anterior is None:
+                self.ema[periodo] = float(price)
+            else:
+                self.ema[periodo] = price * k + anterior * (1 - k)
+
+        if len(self.prices) < 51:
+            return None
+
+        p = np.fromiter(self.prices, dtype=np.float64)
+        v = np.fromiter(self.volumes, dtype=np.float64)
+        deltas = np.diff(p)
+        returns = deltas / p[:-1]
+
+        row = [v[-1], returns[-1], deltas[-1]]
+        for janela in (5, 10, 20, 50):
+            ma = p[-janela:].mean()
+            row.append(ma)
+            row.append(p[-1] / ma)
+        for janela in (5, 10, 20):
+            row.append(returns[-janela:].std(ddof=1))
+        for janela in (5, 10):
+            row.append(p[-1] / p[-1 - janela] - 1)
+        ganhos = np.clip(deltas, 0, None)
+        perdas = np.clip(-deltas, 0, None)
+        for janela in (14, 21):
+            media_perdas = perdas[-janela:].mean()
+            if media_perdas == 0:
+                row.append(100.0)
+            else:
+                rs = ganhos[-janela:].mean() / media_perdas
+                row.append(100 - (100 / (1 + rs)))
+        for janela in (5, 10, 20):
+            row.append(v[-janela:].mean())
+        row.append(self.ema[12])
+        row.append(self.ema[26])
+        row.append(self.ema[12] - self.ema[26])
+
+        self.last_row = np.asarray(row, dtype=np.float32)
+        return self.last_row
+
+
+class MLPredictor:
+    """Treina e aplica modelos de previsão de sinais por símbolo."""
+
+    def __init__(self, model_dir: str = "models"):
+        self.model_dir = model_dir
+        self.models = {}
+        self.scalers = {}
+        self.model_info = {}
+        self._train_cache = {}
+        self._feature_states = {}
+        os.makedirs(self.model_dir, exist_ok=True)
+        self._load_models()
+
+    def _load_models(self):
+        """Indexa os modelos salvos sem carregá-los (lazy loading).
+
+        Só registra os caminhos por símbolo; o joblib.load acontece no
+        primeiro predict() de cada símbolo via _ensure_loaded. Mantém a
+        inicialização O(1) mesmo com muitos símbolos no diretório.
+        """
+        self._model_paths = {}
+        for filename in os.listdir(self.model_dir):
+            path = os.path.join(self.model_dir, filename)
+            if filename.endswith("_model.pkl"):
+                symbol = filename[: -len("_model.pkl")]
+                self._model_paths.setdefault(symbol, {})["model"] = path
+            elif filename.endswith("_scaler.pkl"):
+                symbol = filename[: -len("_scaler.pkl")]
+                self._model_paths.setdefault(symbol, {})["scaler"] = path
+
+    def _ensure_loaded(self, symbol: str):
+        """Carrega modelo e scaler do símbolo sob demanda."""
+        if symbol in self.models:
+            return
+        paths = self._model_paths.get(symbol)
+        if not paths or "model" not in paths:
+            return
+        self.models[symbol] = joblib.load(paths["model"])
+        if "scaler" in paths:
+            self.scalers[symbol] = joblib.load(paths["scaler"])
+
+    def _dump(self, obj, filename: str):
+        """Salva modelo/scaler comprimido com LZ4 e pickle protocolo 5.
+
+        LZ4 reduz o arquivo 3-5x com custo de CPU desprezível (o load na
+        inicialização é limitado por disco) e o protocolo 5 serializa os
+        arrays numpy out-of-band, sem cópia extra. Se o pacote lz4 não
+        estiver instalado, joblib cai automaticamente para zlib.
+        """
+        path = os.path.join(self.model_dir, filename)
+        try:
+            joblib.dump(obj, path, compress=("lz4", 3), protocol=5)
+        except ValueError:
+            joblib.dump(obj, path, compress=3, protocol=5)
+
+    def _create_features(self, prices, volumes=None) -> pd.DataFrame:
+        """Constrói o DataFrame de features a partir do histórico de preços."""
+        price = pd.Series(prices, dtype="float64")
+        if volumes is not None:
+            volume = pd.Series(volumes, dtype="float64")
+        else:
+            volume = pd.Series(np.zeros(len(price)))
+
+        # Monta todas as colunas como ndarrays num dict e constrói o
+        # DataFrame uma única vez no final: inserir coluna a coluna num
+        # DataFrame realoca/defragmenta o bloco interno a cada atribuição.
+        cols = {"price": price.to_numpy()}
+        cols["volume"] = volume.to_numpy()
+        returns = price.pct_change()
+        cols["return"] = returns.to_numpy()
+        cols["diff"] = price.diff().to_numpy()
+
+        for window in [5, 10, 20, 50]:
+            ma = price.rolling(window).mean().to_numpy()
+            cols[f"ma_{window}"] = ma
+            cols[f"ma_ratio_{window}"] = cols["price"] / ma
+
+        for window in [5, 10, 20]:
+            cols[f"volatility_{window}"] = returns.rolling(window).std().to_numpy()
+
+        for window in [5, 10]:
+            cols[f"momentum_{window}"] = price.pct_change(window).to_numpy()
+
+        delta = price.diff()
+        gain_base = delta.clip(lower=0)
+        loss_base = -delta.clip(upper=0)
+        for window in [14, 21]:
+            gain = gain_base.rolling(window).mean()
+            loss = loss_base.rolling(window).mean()
+            rs = gain / loss
+            cols[f"rsi_{window}"] = (100 - (100 / (1 + rs))).to_numpy()
+
+        for window in [5, 10, 20]:
+            cols[f"vol_ma_{window}"] = volume.rolling(window).mean().to_numpy()
+
+        ema = {}
+        for window in [12, 26]:
+            ema[window] = price.ewm(span=window, adjust=False).mean().to_numpy()
+            cols[f"ema_{window}"] = ema[window]
+        cols["macd"] = ema[12] - ema[26]
+
+        return pd.DataFrame(cols, index=price.index).dropna()
+
+    def _prepare_training_data(self, df: pd.DataFrame, horizon: int = 5,
+                               threshold: float = 0.002):
+        """Gera matriz de features e vetor alvo (-1, 0, +1) para o treino."""
+        future_return = df["price"].shift(-horizon) / df["price"] - 1
+        # Alvo em int8 (três classes cabem em 1 byte) e features em
+        # float32: metade da banda de memória que float64 ao alimentar o
+        # HistGBM, sem perda relevante para razões de preço.
+        target = np.zeros(len(df), dtype=np.int8)
+        target[future_return.values > threshold] = 1
+        target[future_return.values < -threshold] = -1
+
+        features = df.drop(columns=["price"])
+        valid = ~future_return.isna()
+        X = features[valid].to_numpy(dtype=np.float32, copy=False)
+        return X, target[valid.values]
+
+    @staticmethod
+    def _price_tail_hash(prices) -> str:
+        """Hash do rabo do histórico, usado para detectar dados repetidos."""
+        tail = np.asarray(prices[-500:], dtype=np.float64)
+        return hashlib.blake2b(tail.tobytes(), digest_size=8).hexdigest()
+
+    def train(self, symbol: str, prices, volumes=None, force: bool = False) -> dict:
+        """Treina o modelo do símbolo com validação expanding-window.
+
+        Usa TimeSeriesSplit (nunca embaralha amostras — dados temporais) e
+        reaproveita a ensemble entre folds com warm_start, crescendo
+        max_iter a cada split em vez de treinar do zero. Se o rabo do
+        histórico não mudou desde o último treino, devolve o resultado
+        memorizado em vez de reconstruir features e reajustar.
+        """
+        tail_hash = self._price_tail_hash(prices)
+        if not force:
+            cached = self._train_cache.get(symbol)
+            if cached is not None and cached[0] == tail_hash:
+                return {"trained": True, "accuracy": cached[1], "cached": True}
+
+        df = self._create_features(prices, volumes)
+        if len(df) < 100:
+            return {"trained": False, "reason": "dados insuficientes"}
+
+        X, y = self._prepare_training_data(df)
+
+        scaler = StandardScaler()
+        X = scaler.fit_transform(X)
+
+        tscv = TimeSeriesSplit(n_splits=5)
+        model = HistGradientBoostingClassifier(
+            max_iter=50, warm_start=True, random_state=42
+        )
+
+        accuracies = []
+        for train_idx, test_idx in tscv.split(X):
+            model.fit(X[train_idx], y[train_idx])
+            accuracies.append(model.score(X[test_idx], y[test_idx]))
+            # Cresce a ensemble no próximo fold reaproveitando as árvores já
+            # ajustadas (warm_start) em vez de recomeçar do zero.
+            model.max_iter += 50
+
+        accuracy = float(np.mean(accuracies))
+
+        self.models[symbol] = model
+        self.scalers[symbol] = scaler
+        self.model_info[symbol] = {
+            "accuracy": accuracy,
+            "samples": len(X),
+            "cv_scores": accuracies,
+        }
+
+        self._train_cache[symbol] = (tail_hash, accuracy)
+
+        self._dump(model, f"{symbol}_model.pkl")
+        self._dump(scaler, f"{symbol}_scaler.pkl")
+
+        logger.info("🤖 Modelo %s treinado - acurácia média (CV): %.2f%%",
+                    symbol, accuracy * 100)
+        return {"trained": True, "accuracy": accuracy}
+
+    def predict(self, symbol: str, prices, volumes=None) -> dict:
+        """Prevê o sinal para o último preço do histórico.
+
+        As features são mantidas incrementalmente por símbolo: só os
+        preços ainda não vistos alimentam o estado, em vez de reconstruir
+        o DataFrame inteiro a cada chamada para usar apenas a última
+        linha.
+        """
+        self._ensure_loaded(symbol)
+        if symbol not in self.models:
+            return {"signal": 0, "confidence": 0.0, "reason": "sem modelo"}
+
+        row = self._update_features(symbol, prices, volumes)
+        if row is None:
+            return {"signal": 0, "confidence": 0.0, "reason": "dados insuficientes"}
+
+        X = self.scalers[symbol].transform(row.reshape(1, -1))
+
+        model = self.models[symbol]
+        signal = int(model.predict(X)[0])
+        proba = model.predict_proba(X)[0]
+        confidence = float(proba.max())
+
+        return {"signal": signal, "confidence": confidence}
+
+    def _update_features(self, symbol: str, prices, volumes=None):
+        """Alimenta o estado incremental do símbolo com os preços novos."""
+        state, vistos = self._feature_states.get(symbol, (None, 0))
+        if state is None or len(prices) < vistos:
+            state = IncrementalFeatureState()
+            vistos = max(0, len(prices) - IncrementalFeatureState.WINDOW)
+
+        row = None
+        for i in range(vistos, len(prices)):
+            volume = volumes[i] if volumes is not None else 0.0
+            row = state.update(prices[i], volume)
+        self._feature_states[symbol] = (state, len(prices))
+
+        return row if row is not None else state.last_row
+
+    def optimize_model(self, symbol: str, prices, volumes=None) -> dict:
+        """Reajusta hiperparâmetros básicos do modelo e salva o melhor."""
+        df = self._create_features(prices, volumes)
+        if len(df) < 200:
+            return {"optimized": False, "reason": "dados insuficientes"}
+
+        X, y = self._prepare_training_data(df)
+        scaler = StandardScaler()
+        X = scaler.fit_transform(X)
+
+        tscv = TimeSeriesSplit(n_splits=3)
+        best_model = None
+        best_score = -np.inf
+        for learning_rate in (0.05, 0.1, 0.2):
+            model = HistGradientBoostingClassifier(
+                learning_rate=learning_rate, max_iter=100, random_state=42
+            )
+            scores = []
+            for train_idx, test_idx in tscv.split(X):
+                model.fit(X[train_idx], y[train_idx])
+                scores.append(model.score(X[test_idx], y[test_idx]))
+            score = float(np.mean(scores))
+            if score > best_score:
+                best_score = score
+                best_model = model
+
+        self.models[symbol] = best_model
+        self.scalers[symbol] = scaler
+        self._dump(best_model, f"{symbol}_model.pkl")
+        self._dump(scaler, f"{symbol}_scaler.pkl")
+
+        return {"optimized": True, "accuracy": best_score}
+
+    def get_model_info(self, symbol: str) -> dict:
+        """Retorna metadados do modelo do símbolo, se existir."""
+        self._ensure_loaded(symbol)
+        if symbol not in self.models:
+            return {"exists": False}
+        info = {"exists": True}
+        info.update(self.model_info.get(symbol, {}))
+        return info
@@ -0,0 +1,43 @@
+"""
+Ponto de entrada do bot.
+
+Confere as dependências antes de subir e só então importa o resto do
+código — ``importlib.util.find_spec`` olha o sys.path sem executar os
+módulos, então a checagem custa sub-milissegundo em vez de pagar o
+import frio do aiohttp (~200ms) só para saber se ele existe.
+"""
+
+import asyncio
+import importlib.util
+import sys
+from typing import List
+
+# Dependências obrigatórias em runtime (checadas por nome de módulo).
+DEPENDENCIAS = ("requests", "aiohttp", "numpy")
+
+
+def check_dependencies(modulos=DEPENDENCIAS) -> List[str]:
+    """Devolve a lista de dependências ausentes (vazia se tudo OK)."""
+    return [m for m in modulos if importlib.util.find_spec(m) is None]
+
+
+def main() -> int:
+    faltando = check_dependencies()
+    if faltando:
+        print(f"❌ Dependências ausentes: {', '.join(faltando)}")
+        print("   Instale com: pip install " + " ".join(faltando))
+        return 1
+
+    # Import adiado: só paga o custo depois da checagem passar.
+    from bot import TradingBot
+
+    bot = TradingBot()
+    try:
+        asyncio.run(bot.run())
+    except KeyboardInterrupt:
+        print("\n🛑 Bot interrompido pelo usuário")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
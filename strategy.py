@@ -0,0 +1,164 @@
+"""
+Camada de decisão do bot.
+
+Análise básica (alertas de variação) e análise de entrada/saída sobre
+os indicadores de ``core.estrategias``. O ticker 24h chega da API como
+dict; ele é convertido uma vez por tick num ``Ticker`` (namedtuple) com
+os derivados já calculados — depois disso tudo é acesso por atributo,
+sem repetir hash de dict nem float() por leitura.
+"""
+
+import logging
+import os
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from core._strategy_kernels import COMPRA, VENDA, _decide
+from core.estrategias import calcular_indicadores
+
+_NAN = float("nan")
+
+logger = logging.getLogger(__name__)
+
+# Volume acima deste quote volume 24h é considerado "alto".
+VOLUME_ALTO_MIN = 1e9
+
+# Classificação de alerta por tabela: a chave é (bucket de magnitude,
+# direção) — duas comparações que viram índices, em vez de uma cadeia
+# de if/elif imprevisível para feeds ruidosos.
+_ALERT_MSG = {
+    (0, 0): "", (0, 1): "",
+    (1, 0): "CAIU ${:.2f}!", (1, 1): "SUBIU ${:.2f}!",
+    (2, 0): "QUEDA FORTE ${:.2f}!", (2, 1): "SUBIDA FORTE ${:.2f}!",
+}
+
+# Ticker 24h pré-digerido: campos numéricos convertidos e derivados
+# (volume médio por negócio, flag de volume alto) calculados uma vez.
+Ticker = namedtuple(
+    "Ticker",
+    "price_change_pct quote_volume count volume_medio volume_alto",
+)
+
+
+def ticker_from_dict(dados_24h) -> Ticker:
+    """Converte o dict cru da API num Ticker, uma vez por tick."""
+    quote_volume = float(dados_24h.get("quoteVolume", 0.0))
+    count = int(dados_24h.get("count", 0))
+    return Ticker(
+        price_change_pct=float(dados_24h.get("priceChangePercent", 0.0)),
+        quote_volume=quote_volume,
+        count=count,
+        volume_medio=quote_volume / count if count else 0.0,
+        volume_alto=quote_volume > VOLUME_ALTO_MIN,
+    )
+
+
+def analisar_basico(symbol: str, preco_atual: float,
+                    preco_anterior: float, ticker: Ticker) -> dict:
+    """Alerta rápido de variação entre dois ticks."""
+    if preco_anterior:
+        variacao = (preco_atual - preco_anterior) / preco_anterior * 100
+    else:
+        variacao = 0.0
+    variacao_absoluta = abs(preco_atual - preco_anterior)
+
+    bucket = (variacao_absoluta >= 5) + (variacao_absoluta > 10)
+    template = _ALERT_MSG[bucket, preco_atual > preco_anterior]
+    alerta = template.format(variacao_absoluta) if template else ""
+
+    return {
+        "symbol": symbol,
+        "variacao": variacao,
+        "volume_alto": ticker.volume_alto,
+        "alerta": alerta,
+    }
+
+
+# Motivos indexados pelo bit correspondente na máscara do kernel.
+_MOTIVOS_COMPRA = ("RSI sobrevendido", "tendência de alta",
+                   "MACD positivo", "queda com volume alto")
+_MOTIVOS_VENDA = ("RSI sobrecomprado", "tendência de baixa",
+                  "MACD negativo", "alta com volume alto")
+
+
+def _motivos(tabela, mask):
+    # Só roda no branch raro em que o sinal dispara; os motivos saem
+    # direto dos bits, sem reavaliar condição nenhuma.
+    return "; ".join(
+        tabela[i] for i in range(4) if (mask >> i) & 1
+    )
+
+
+def analisar_entrada_saida(symbol: str, preco_atual: float,
+                           candles, ticker: Ticker) -> dict:
+    """Decide COMPRA/VENDA/AGUARDAR a partir dos indicadores.
+
+    O score numérico roda no kernel compilado de
+    core._strategy_kernels; aqui só ficam a conversão None→NaN na
+    entrada e o mapeamento int→string (com motivos) na saída.
+    """
+    indicadores = calcular_indicadores(candles)
+    if indicadores is None:
+        return {"symbol": symbol, "sinal": "AGUARDAR", "motivos": ""}
+
+    rsi = indicadores["rsi"]
+    macd = indicadores["macd"]
+    ma7 = indicadores["ma7"]
+    ma25 = indicadores["ma25"]
+    codigo, stop_loss, take_profit = _decide(
+        preco_atual,
+        _NAN if rsi is None else rsi,
+        _NAN if macd is None else macd,
+        _NAN if ma7 is None else ma7,
+        _NAN if ma25 is None else ma25,
+        ticker.price_change_pct,
+        1 if ticker.volume_alto else 0,
+    )
+    codigo = int(codigo)
+    sinal = codigo & 3
+    mask = codigo >> 2
+
+    if sinal == COMPRA:
+        return {
+            "symbol": symbol,
+            "sinal": "COMPRA",
+            "motivos": _motivos(_MOTIVOS_COMPRA, mask),
+            "stop_loss": stop_loss,
+            "take_profit": take_profit,
+        }
+    if sinal == VENDA:
+        return {
+            "symbol": symbol,
+            "sinal": "VENDA",
+            "motivos": _motivos(_MOTIVOS_VENDA, mask),
+            "stop_loss": stop_loss,
+            "take_profit": take_profit,
+        }
+    return {"symbol": symbol, "sinal": "AGUARDAR", "motivos": ""}
+
+
+# Pool compartilhado para decisões multi-símbolo: os kernels são
+# nogil, então as threads executam código nativo em paralelo de
+# verdade durante o trecho numérico.
+_pool = None
+
+
+def _get_pool() -> ThreadPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ThreadPoolExecutor(max_workers=os.cpu_count())
+    return _pool
+
+
+def analisar_lote(lote) -> list:
+    """Decide um lote de símbolos num tick, em paralelo.
+
+    ``lote`` é uma sequência de tuplas ``(symbol, preco_atual,
+    candles, ticker)`` — os mesmos argumentos de
+    analisar_entrada_saida. Um símbolo só não paga o overhead do pool.
+    """
+    if len(lote) <= 1:
+        return [analisar_entrada_saida(*args) for args in lote]
+    return list(_get_pool().map(
+        lambda args: analisar_entrada_saida(*args), lote
+    ))
@@ -0,0 +1,44 @@
+"""
+Testes de regressão numérica dos indicadores.
+
+Os valores esperados foram calculados de forma independente (aritmética
+pura em Python sobre a mesma série) e ficam pinados aqui — qualquer
+refatoração dos indicadores que mude o resultado numérico falha o teste
+em vez de regredir em silêncio. A tolerância relativa absorve o
+arredondamento de float32 dos kernels.
+"""
+
+import pytest
+
+from core.estrategias import calcular_ema, calcular_macd, calcular_rsi
+
+PRECOS = [
+    100.0, 101.5, 99.8, 102.3, 103.1, 101.9, 104.2, 105.0, 103.7,
+    106.1, 107.4, 106.8, 108.2, 109.5, 108.9, 110.3, 111.0, 109.8,
+    112.4, 113.1, 111.9, 114.0, 115.2, 114.6, 116.3, 117.1, 115.9,
+    118.2, 119.0, 117.8,
+]
+
+
+def test_rsi_valor_pinado():
+    assert calcular_rsi(PRECOS, 14) == pytest.approx(
+        70.49180327868854, rel=1e-6
+    )
+
+
+def test_ema_valor_pinado():
+    assert calcular_ema(PRECOS, 9) == pytest.approx(
+        116.29771634821543, rel=1e-5
+    )
+
+
+def test_macd_valor_pinado():
+    assert calcular_macd(PRECOS, 12, 26) == pytest.approx(
+        3.689883653579912, rel=1e-4
+    )
+
+
+def test_historico_curto_devolve_none():
+    assert calcular_rsi(PRECOS[:10], 14) is None
+    assert calcular_ema(PRECOS[:5], 9) is None
+    assert calcular_macd(PRECOS[:20], 12, 26) is None